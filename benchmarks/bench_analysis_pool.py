@@ -0,0 +1,75 @@
+"""
+Benchmark for the analysis process pool.
+
+Detects N unique generated strings inline (one core, on the loop) and through
+AnalysisPool with increasing worker counts. On a machine with enough cores the
+rate should grow close to linearly with workers; pool start-up (spawning and
+loading the model in each worker) is timed separately and excluded.
+
+    python -m benchmarks.bench_analysis_pool [--strings 5000] [--workers 1,2,4] [--backend langdetect]
+"""
+import argparse
+import asyncio
+import logging
+import os
+import random
+import time
+
+from benchmarks.corpus import WORDS
+from src.analysis_pool import AnalysisPool, default_workers
+from src.detection import LanguageDetector, make_backend
+
+LANGUAGES = list(WORDS)
+
+
+def generate_strings(n, seed=0):
+    rng = random.Random(seed)
+    texts = []
+    for i in range(n):
+        lang = rng.choice(LANGUAGES)
+        texts.append(' '.join(rng.choice(WORDS[lang]) for _ in range(rng.randint(3, 12))) + f" {i}")
+    return texts
+
+
+async def run_pool(texts, backend, workers):
+    pool = AnalysisPool(backend, LANGUAGES, workers)
+    try:
+        started = time.perf_counter()
+        # Warm-up: every worker spawns and loads its backend
+        await asyncio.gather(*(pool.detect(['warm up text']) for _ in range(workers * 2)))
+        startup = time.perf_counter() - started
+        started = time.perf_counter()
+        detections = await pool.detect(texts)
+        return startup, time.perf_counter() - started, detections
+    finally:
+        pool.close()
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    parser.add_argument('--strings', type=int, default=5000)
+    parser.add_argument('--workers', default='1,2,4', help='comma separated worker counts')
+    parser.add_argument('--backend', default='langdetect')
+    args = parser.parse_args()
+
+    logging.disable(logging.WARNING)
+    texts = generate_strings(args.strings)
+    print(f"cores={os.cpu_count()} default_workers={default_workers()} backend={args.backend}")
+
+    backend = make_backend(args.backend, LANGUAGES)
+    started = time.perf_counter()
+    inline = LanguageDetector(backend=backend).detect_many(texts)
+    inline_s = time.perf_counter() - started
+    print(f"inline     : {len(texts) / inline_s:>9,.0f} strings/s")
+
+    for workers in [int(w) for w in args.workers.split(',')]:
+        startup, seconds, detections = asyncio.run(run_pool(texts, args.backend, workers))
+        agree = sum(1 for text, d in zip(texts, detections) if d.lang == inline[text].lang) / len(texts)
+        print(
+            f"{workers} worker(s): {len(texts) / seconds:>9,.0f} strings/s "
+            f"(x{inline_s / seconds:.2f} vs inline, start-up {startup:.1f}s, {agree:.1%} same as inline)"
+        )
+
+
+if __name__ == '__main__':
+    main()
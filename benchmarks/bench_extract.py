@@ -0,0 +1,113 @@
+"""
+Benchmark for the DOM text extractor.
+
+Generates large SPA-like HTML fixtures (deeply nested div/span trees, nav and
+footer chrome, mixed-language text) into benchmarks/fixtures/, then times
+src.extract.extract_items against the old nested find_all/get_text scan.
+
+    python -m benchmarks.bench_extract [--sizes 200,1000,4000] [--depth 12]
+"""
+import argparse
+import os
+import random
+import time
+
+from bs4 import BeautifulSoup
+
+from src.extract import HTML_PARSER, extract_items
+
+FIXTURE_DIR = os.path.join(os.path.dirname(__file__), 'fixtures')
+
+WORDS = {
+    'en': "sign in account settings pricing help search cart checkout welcome back your order".split(),
+    'es': "iniciar sesión cuenta ajustes precios ayuda buscar carrito pagar bienvenido de nuevo pedido".split(),
+}
+
+
+def _sentence(rng, lang, n):
+    return ' '.join(rng.choice(WORDS[lang]) for _ in range(n)).capitalize()
+
+
+def generate_fixture(blocks, depth, seed=0):
+    """One page with `blocks` content blocks, each wrapped in `depth` nested containers."""
+    rng = random.Random(seed)
+    out = ['<html><head><title>Fixture</title><style>.x{color:red}</style></head><body>']
+    out.append('<nav>' + ''.join(f'<a href="/p{i}">{_sentence(rng, "en", 2)}</a>' for i in range(20)) + '</nav>')
+    for b in range(blocks):
+        lang = 'en' if rng.random() < 0.2 else 'es'
+        opening = ''.join(f'<div class="c{d}"><span>' if d % 2 else f'<div id="b{b}-{d}">' for d in range(depth))
+        closing = ''.join('</span></div>' if d % 2 else '</div>' for d in reversed(range(depth)))
+        inner = (
+            f'<h3>{_sentence(rng, lang, 3)}</h3>'
+            f'<p>{_sentence(rng, lang, 8)} <b>{_sentence(rng, lang, 2)}</b></p>'
+            f'<ul><li>{_sentence(rng, lang, 4)}</li><li>{_sentence(rng, lang, 4)}</li></ul>'
+            f'<button name="btn{b}">{_sentence(rng, lang, 2)}</button>'
+            f'<label for="f{b}">{_sentence(rng, lang, 1)}</label>'
+        )
+        out.append(opening + inner + closing)
+    out.append('<footer>' + ''.join(f'<span>{_sentence(rng, "en", 2)}</span>' for _ in range(15)) + '</footer>')
+    out.append('<script>var x = "not text";</script></body></html>')
+    return ''.join(out)
+
+
+def load_fixture(blocks, depth):
+    os.makedirs(FIXTURE_DIR, exist_ok=True)
+    path = os.path.join(FIXTURE_DIR, f'page_{blocks}x{depth}.html')
+    if not os.path.exists(path):
+        with open(path, 'w', encoding='utf-8') as f:
+            f.write(generate_fixture(blocks, depth))
+    with open(path, encoding='utf-8') as f:
+        return f.read()
+
+
+def legacy_extract(soup):
+    """The previous _extract_text scan, kept here only as the comparison baseline."""
+    extracted = []
+    for btn in soup.find_all(['button', 'a']):
+        text = btn.get_text(strip=True)
+        if text:
+            extracted.append({'type': 'button', 'text': text, 'context': str(btn)[:100]})
+    for h in soup.find_all(['h1', 'h2', 'h3', 'h4', 'h5', 'h6']):
+        text = h.get_text(strip=True)
+        if text:
+            extracted.append({'type': 'heading', 'text': text, 'context': str(h)[:100]})
+    for tag in soup.find_all(['label', 'span', 'p', 'div', 'li', 'td', 'th']):
+        text = tag.get_text(strip=True)
+        if not text or len(text) > 1000 or tag.parent.name in ['script', 'style', 'head', 'noscript']:
+            continue
+        extracted.append({'type': 'text', 'text': text, 'context': str(tag)[:100]})
+    return extracted
+
+
+def _time(fn, repeat):
+    best = float('inf')
+    result = None
+    for _ in range(repeat):
+        started = time.perf_counter()
+        result = fn()
+        best = min(best, time.perf_counter() - started)
+    return best, result
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    parser.add_argument('--sizes', default='200,1000,4000', help='comma separated block counts')
+    parser.add_argument('--depth', type=int, default=12, help='container nesting depth per block')
+    parser.add_argument('--repeat', type=int, default=3)
+    args = parser.parse_args()
+
+    print(f"parser={HTML_PARSER}")
+    for blocks in [int(s) for s in args.sizes.split(',')]:
+        html = load_fixture(blocks, args.depth)
+        parse_s, soup = _time(lambda: BeautifulSoup(html, HTML_PARSER), args.repeat)
+        new_s, items = _time(lambda: extract_items(soup), args.repeat)
+        old_s, _ = _time(lambda: legacy_extract(soup), args.repeat)
+        print(
+            f"{blocks:>6} blocks ({len(html) / 1024:.0f} KiB): parse {parse_s * 1000:.0f} ms | "
+            f"extract {new_s * 1000:.0f} ms ({len(items)} items) | legacy {old_s * 1000:.0f} ms | "
+            f"speedup x{old_s / new_s:.1f}"
+        )
+
+
+if __name__ == '__main__':
+    main()
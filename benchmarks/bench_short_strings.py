@@ -0,0 +1,49 @@
+"""
+Benchmark for the short-string verifier.
+
+Takes every unique 4-15 character item of generated locale pages (nav, buttons,
+badges, with the corpus' share of English fallbacks) and compares the old rule,
+which flagged each of them as suspected_mixed, with the verifier's verdicts.
+Reports issue volume before/after, the fallbacks it confirms and strings/s.
+
+    python -m benchmarks.bench_short_strings [--pages 200] [--langs es,fr,de]
+"""
+import argparse
+import time
+
+from benchmarks.corpus import corpus_pages
+from src.extract import extract_items, parse_html
+from src.short_strings import AMBIGUOUS, BASE, ShortStringVerifier
+
+
+def short_strings(lang, pages):
+    texts = set()
+    for _, html in corpus_pages(pages, lang=lang):
+        texts.update(item['text'] for item in extract_items(parse_html(html)) if 3 < len(item['text']) <= 15)
+    return sorted(texts)
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    parser.add_argument('--pages', type=int, default=200)
+    parser.add_argument('--langs', default='es,fr,de')
+    args = parser.parse_args()
+
+    for lang in args.langs.split(','):
+        texts = short_strings(lang, args.pages)
+        verifier = ShortStringVerifier('en')
+        verifier.verify('warm up', lang)
+        started = time.perf_counter()
+        verdicts = [verifier.verify(text, lang)[0] for text in texts]
+        elapsed = time.perf_counter() - started
+        flagged = sum(1 for verdict in verdicts if verdict == AMBIGUOUS)
+        fallbacks = sum(1 for verdict in verdicts if verdict == BASE)
+        print(
+            f"{lang}: {len(texts)} short strings, suspected_mixed {len(texts)} -> {flagged} "
+            f"(x{len(texts) / max(flagged, 1):.1f} fewer), {fallbacks} confirmed fallbacks, "
+            f"{len(texts) / elapsed:,.0f} strings/s"
+        )
+
+
+if __name__ == '__main__':
+    main()
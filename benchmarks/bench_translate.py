@@ -0,0 +1,98 @@
+"""
+Benchmark for LingoClient against the local stub engine.
+
+Checks that a batch takes about ceil(n / concurrency) x latency, that duplicate
+texts are coalesced into one call, and that transient errors are retried.
+With --cache the batch runs twice through a temporary TranslationCache and the
+second (repeat-scan) pass must make no engine calls. Any check that fails
+raises AssertionError (exit 1).
+
+    python -m benchmarks.bench_translate [--texts 200] [--concurrency 10] [--latency 0.05] [--error-rate 0.1] [--cache]
+"""
+import argparse
+import asyncio
+import logging
+import math
+import os
+import tempfile
+import time
+
+from benchmarks.stub_lingo import StubEngine
+from src.lingo import LingoClient
+from src.translation_cache import TranslationCache
+
+
+async def run(texts, concurrency, latency, error_rate, cache=None):
+    engine = StubEngine(latency=latency, error_rate=error_rate)
+    client = LingoClient(api_key='stub', concurrency=concurrency, engine_factory=lambda: engine, cache=cache)
+    # Every text twice: the duplicates must not cost extra calls
+    batch = [f"String number {i}" for i in range(texts)] * 2
+
+    started = time.perf_counter()
+    results = await asyncio.gather(
+        client.suggest_translation_batch(batch[:texts], 'es'),
+        client.suggest_translation_batch(batch[texts:], 'es'),
+    )
+    elapsed = time.perf_counter() - started
+    await client.close()
+
+    ideal = math.ceil(texts / concurrency) * latency
+    untranslated = [text for result in results for text in batch[:texts] if not result.get(text)]
+    return untranslated, {
+        'texts': texts,
+        'concurrency': concurrency,
+        'elapsed_s': round(elapsed, 3),
+        'ideal_s': round(ideal, 3),
+        'serial_s': round(texts * latency, 3),
+        'strings_per_s': round(texts / elapsed, 1),
+        'engine_calls': engine.calls,
+        'max_in_flight': engine.max_in_flight,
+        'translated': len(results[0]),
+        'client': client.stats,
+    }
+
+
+def check(result, untranslated, warm, tolerance):
+    """Asserts what the client promises; `warm` is a pass whose translations are all cached."""
+    assert not untranslated, f"{len(untranslated)} strings not translated, e.g. {untranslated[:3]}"
+    assert result['max_in_flight'] <= result['concurrency'], result
+    if warm:
+        assert result['engine_calls'] == 0, f"warm cache pass called the engine: {result}"
+        return
+    # Duplicates coalesced: one call per unique text, plus one per retry
+    assert result['engine_calls'] == result['texts'] + result['client']['retries'], result
+    if not result['client']['retries']:
+        # Retries wait out a backoff, so wall time is only checked on a clean run
+        assert result['elapsed_s'] <= result['ideal_s'] * (1 + tolerance) + 0.05, f"slower than ideal: {result}"
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    parser.add_argument('--texts', type=int, default=200)
+    parser.add_argument('--concurrency', type=int, default=10)
+    parser.add_argument('--latency', type=float, default=0.05)
+    parser.add_argument('--error-rate', type=float, default=0.0)
+    parser.add_argument('--tolerance', type=float, default=0.5, help='allowed share above the ideal wall time')
+
+    parser.add_argument('--cache', action='store_true', help='run twice through a temporary translation cache')
+    args = parser.parse_args()
+
+    logging.disable(logging.WARNING)
+    if not args.cache:
+        untranslated, result = asyncio.run(run(args.texts, args.concurrency, args.latency, args.error_rate))
+        print(result)
+        check(result, untranslated, warm=False, tolerance=args.tolerance)
+        return
+
+    with tempfile.TemporaryDirectory() as tmp:
+        cache = TranslationCache(os.path.join(tmp, 'cache.sqlite'))
+        for label in ('cold', 'warm'):
+            untranslated, result = asyncio.run(run(args.texts, args.concurrency, args.latency, args.error_rate, cache))
+            print(label, result)
+            check(result, untranslated, warm=label == 'warm', tolerance=args.tolerance)
+        print('cache', cache.stats())
+        cache.close()
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,242 @@
+"""
+Reproducible check of the browser page pool against stand-in browser objects.
+
+Runs PagePool (src/browser_pool.py) over fake Browser/Context/Page objects, so
+no Chromium is needed: tab reuse, context recycling, a page that errors, a tab
+that crashes mid-navigation, a browser that dies and is relaunched, tabs or
+contexts that cannot be opened on a dead browser, and a browser that cannot be
+launched at all (fatal, not a crash). Asserts the pool's stats and that every
+tab and context it opened is closed again at the end.
+
+    python -m benchmarks.check_browser_pool [--jobs 30] [--workers 3] [--recycle-after 5]
+"""
+import argparse
+import asyncio
+
+from src.browser_pool import BrowserCrashed, BrowserLaunchError, PagePool
+
+CLOSED = 'Target page, context or browser has been closed'
+
+
+class FakePage:
+    def __init__(self, context):
+        self.context = context
+        self.closed = False
+        self.handlers = {}
+
+    def on(self, event, handler):
+        self.handlers[event] = handler
+
+    def is_closed(self):
+        return self.closed
+
+    async def goto(self, url):
+        if not self.context.browser.up or self.context.closed:
+            raise Exception(CLOSED)
+        await asyncio.sleep(0.001)
+
+    def crash(self):
+        self.handlers['crash'](self)
+
+    async def close(self):
+        self.closed = True
+
+
+class FakeContext:
+    def __init__(self, browser):
+        self.browser = browser
+        self.closed = False
+        self.pages = []
+        # Next new_page() calls that fail as if the context were gone
+        self.fail_new_pages = 0
+
+    async def new_page(self):
+        if not self.browser.up or self.closed or self.fail_new_pages:
+            self.fail_new_pages = max(0, self.fail_new_pages - 1)
+            raise Exception(CLOSED)
+        page = FakePage(self)
+        self.pages.append(page)
+        return page
+
+    async def close(self):
+        self.closed = True
+        for page in self.pages:
+            page.closed = True
+
+
+class FakeBrowser:
+    def __init__(self):
+        self.up = True
+        self.contexts = []
+        # Dies as soon as a context is asked for (crash between get() and new_context())
+        self.die_on_new_context = False
+
+    def is_connected(self):
+        return self.up
+
+    async def new_context(self):
+        if self.die_on_new_context:
+            self.up = False
+        if not self.up:
+            raise Exception('Browser has been closed')
+        context = FakeContext(self)
+        self.contexts.append(context)
+        return context
+
+    async def close(self):
+        self.up = False
+
+
+class FakeManager:
+    """BrowserManager stand-in: relaunches on get() when the browser is gone."""
+
+    def __init__(self, launches=True):
+        self.browsers = [FakeBrowser()] if launches else []
+        self.generation = 1 if launches else 0
+        self.restarts = 0
+        # Every launch fails, like a missing Chromium executable
+        self.launches = launches
+
+    @property
+    def browser(self):
+        return self.browsers[-1]
+
+    def is_connected(self):
+        return bool(self.browsers) and self.browser.up
+
+    async def get(self):
+        if not self.launches:
+            raise BrowserLaunchError("Could not launch Chromium: Executable doesn't exist")
+        if not self.browser.up:
+            self.browsers.append(FakeBrowser())
+            self.generation += 1
+            self.restarts += 1
+        return self.browser, self.generation
+
+    def all_pages(self):
+        return [page for browser in self.browsers for context in browser.contexts for page in context.pages]
+
+    def all_contexts(self):
+        return [context for browser in self.browsers for context in browser.contexts]
+
+
+async def lease(pool, job):
+    """Runs `job(page)` in a leased tab; returns 'ok', 'error' or 'crashed'."""
+    try:
+        async with pool.page() as page:
+            await job(page)
+    except BrowserCrashed:
+        return 'crashed'
+    except ValueError:
+        return 'error'
+    return 'ok'
+
+
+async def navigate(page):
+    await page.goto('https://example.com/')
+
+
+async def check_reuse_and_recycle(jobs, workers, recycle_after):
+    manager = FakeManager()
+    pool = PagePool(manager, recycle_after=recycle_after)
+    queue = asyncio.Queue()
+    for _ in range(jobs):
+        queue.put_nowait(navigate)
+
+    async def worker():
+        while not queue.empty():
+            assert await lease(pool, queue.get_nowait()) == 'ok'
+
+    await asyncio.gather(*(worker() for _ in range(workers)))
+    await pool.close()
+    stats = dict(pool.stats)
+    assert stats['pages_opened'] + stats['pages_reused'] == jobs, stats
+    assert stats['pages_reused'] > 0, stats
+    assert stats['contexts_recycled'] == (jobs - 1) // recycle_after, stats
+    return manager, stats
+
+
+async def check_failures():
+    manager = FakeManager()
+    pool = PagePool(manager, recycle_after=100)
+    results = {}
+
+    async def fails(page):
+        raise ValueError('extraction failed')
+    results['error'] = await lease(pool, fails)
+    results['after_error'] = await lease(pool, navigate)
+
+    async def renderer_crash(page):
+        page.crash()
+        raise Exception('Page crashed')
+    results['renderer_crash'] = await lease(pool, renderer_crash)
+
+    async def browser_dies(page):
+        manager.browser.up = False
+        await page.goto('https://example.com/')
+    results['browser_dies'] = await lease(pool, browser_dies)
+    results['after_relaunch'] = await lease(pool, navigate)
+
+    # Tab cannot be opened: the context is dropped and the next lease gets a fresh one
+    pool._context.fail_new_pages = 1
+    pool._idle.clear()
+    results['new_page_fails'] = await lease(pool, navigate)
+    results['after_new_page_fails'] = await lease(pool, navigate)
+
+    # Browser dies between get() and new_context()
+    manager.browser.up = False
+    manager.browsers.append(FakeBrowser())
+    manager.browser.die_on_new_context = True
+    manager.generation += 1
+    results['new_context_fails'] = await lease(pool, navigate)
+    results['after_new_context_fails'] = await lease(pool, navigate)
+
+    await pool.close()
+    expected = {
+        'error': 'error', 'after_error': 'ok', 'renderer_crash': 'crashed', 'browser_dies': 'crashed',
+        'after_relaunch': 'ok', 'new_page_fails': 'crashed', 'after_new_page_fails': 'ok',
+        'new_context_fails': 'crashed', 'after_new_context_fails': 'ok',
+    }
+    assert results == expected, results
+    return manager, results
+
+
+async def check_launch_failure():
+    """A browser that never started is fatal: BrowserLaunchError, not a retryable BrowserCrashed."""
+    pool = PagePool(FakeManager(launches=False))
+    try:
+        await lease(pool, navigate)
+    except BrowserLaunchError:
+        return 'fatal'
+    raise AssertionError('launch failure was not raised as BrowserLaunchError')
+
+
+def assert_all_closed(manager):
+    open_pages = [page for page in manager.all_pages() if not page.closed]
+    open_contexts = [context for context in manager.all_contexts() if not context.closed]
+    assert not open_pages and not open_contexts, (len(open_pages), len(open_contexts))
+
+
+async def run(args):
+    manager, stats = await check_reuse_and_recycle(args.jobs, args.workers, args.recycle_after)
+    assert_all_closed(manager)
+    print(f"reuse/recycle: {args.jobs} leases over {args.workers} workers -> {stats}")
+
+    manager, results = await check_failures()
+    assert_all_closed(manager)
+    print(f"failures: {results}")
+    print(f"browser relaunches: {manager.restarts}, every tab and context closed")
+    print(f"launch failure: {await check_launch_failure()}")
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    parser.add_argument('--jobs', type=int, default=30)
+    parser.add_argument('--workers', type=int, default=3)
+    parser.add_argument('--recycle-after', type=int, default=5)
+    args = parser.parse_args()
+    asyncio.run(run(args))
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,107 @@
+"""
+Generated multilingual site for benchmarks, served from a local HTTP server.
+
+Every locale (/en/, /es/, /fr/, /de/) has `pages` pages that link to each
+other, share nav/footer chrome and carry a controlled share of English
+fallback strings and broken placeholders, so the crawler, extractor and
+analyzer see the same kind of input as on a real site. Pages are generated
+from their path, so the corpus is deterministic and needs no files on disk.
+"""
+import random
+import threading
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+WORDS = {
+    'en': "sign in account settings pricing help search cart checkout welcome back your order "
+          "shipping returns product details reviews popular new arrivals contact support".split(),
+    'es': "iniciar sesión cuenta ajustes precios ayuda buscar carrito pagar bienvenido de nuevo pedido "
+          "envío devoluciones producto detalles reseñas popular novedades contacto soporte".split(),
+    'fr': "se connecter compte paramètres tarifs aide rechercher panier payer bienvenue retour commande "
+          "livraison retours produit détails avis populaire nouveautés contact assistance".split(),
+    'de': "anmelden konto einstellungen preise hilfe suchen warenkorb kasse willkommen zurück bestellung "
+          "versand rücksendungen produkt details bewertungen beliebt neuheiten kontakt support".split(),
+}
+LOCALES = tuple(WORDS)
+NAV = ['Home', 'Products', 'Pricing', 'Blog', 'Support', 'Sign in']
+
+
+def _sentence(rng, lang, n):
+    return ' '.join(rng.choice(WORDS[lang]) for _ in range(n)).capitalize()
+
+
+def generate_page(lang, index, pages=50, fallback_rate=0.1, blocks=12):
+    """HTML of page `index` of the `lang` locale."""
+    rng = random.Random(f"{lang}-{index}")
+    alternates = ''.join(f'<link rel="alternate" hreflang="{l}" href="/{l}/p{index}">' for l in LOCALES)
+    nav = ''.join(f'<a href="/{lang}/p{(index + k) % pages}">{label}</a>' for k, label in enumerate(NAV))
+    body = []
+    for b in range(blocks):
+        # Non-English locales leak some English, like an unfinished translation
+        text_lang = 'en' if lang != 'en' and rng.random() < fallback_rate else lang
+        body.append(
+            f'<section><h2>{_sentence(rng, text_lang, 4)}</h2>'
+            f'<p>{_sentence(rng, text_lang, 14)}</p>'
+            f'<div><span>{_sentence(rng, text_lang, 6)}</span></div>'
+            f'<button name="b{b}">{_sentence(rng, text_lang, 2)}</button></section>'
+        )
+    if rng.random() < 0.2:
+        body.append(f'<p>{_sentence(rng, lang, 3)} {{{{user}}</p>')
+    links = ''.join(f'<a href="/{lang}/p{rng.randrange(pages)}">{_sentence(rng, lang, 2)}</a>' for _ in range(8))
+    return (
+        f'<html lang="{lang}"><head><title>{_sentence(rng, lang, 3)}</title>{alternates}'
+        f'<style>.hidden{{display:none}}</style></head><body>'
+        f'<nav>{nav}</nav><main>{"".join(body)}<aside>{links}</aside></main>'
+        f'<footer><span>Privacy</span><span>Terms</span><span>© 2026</span></footer>'
+        f'<script>window.__STATE__ = {{"x": 1}}</script></body></html>'
+    )
+
+
+def corpus_pages(count, lang='es', pages=50):
+    """(url, html) pairs for offline microbenchmarks."""
+    return [(f"http://corpus.local/{lang}/p{i}", generate_page(lang, i % pages, pages)) for i in range(count)]
+
+
+class CorpusServer:
+    """
+    Serves the corpus on 127.0.0.1 from a background thread. `latency` (seconds)
+    is slept per response to stand in for a real server.
+
+        with CorpusServer(pages=50) as server:
+            crawl(server.url + '/es/p0')
+    """
+
+    def __init__(self, pages=50, latency=0.0, port=0):
+        self.pages = pages
+        self.latency = latency
+        corpus = self
+
+        class Handler(BaseHTTPRequestHandler):
+            def do_GET(self):
+                parts = self.path.split('?')[0].strip('/').split('/')
+                lang = parts[0] if parts[0] in WORDS else 'en'
+                index = int(parts[1][1:]) if len(parts) > 1 and parts[1][1:].isdigit() else 0
+                if corpus.latency:
+                    threading.Event().wait(corpus.latency)
+                body = generate_page(lang, index % corpus.pages, corpus.pages).encode('utf-8')
+                self.send_response(200)
+                self.send_header('Content-Type', 'text/html; charset=utf-8')
+                self.send_header('Content-Length', str(len(body)))
+                self.end_headers()
+                self.wfile.write(body)
+
+            def log_message(self, *args):
+                pass
+
+        self._server = ThreadingHTTPServer(('127.0.0.1', port), Handler)
+        self._server.daemon_threads = True
+        self.url = f"http://127.0.0.1:{self._server.server_port}"
+        self._thread = None
+
+    def __enter__(self):
+        self._thread = threading.Thread(target=self._server.serve_forever, daemon=True)
+        self._thread.start()
+        return self
+
+    def __exit__(self, exc_type, exc, tb):
+        self._server.shutdown()
+        self._server.server_close()
@@ -0,0 +1,90 @@
+"""
+Local stand-ins for Lingo.dev with configurable latency and failures, so
+LingoClient can be measured without the network or an API key:
+
+  StubEngine      - in-process replacement for LingoDotDevEngine
+  StubLingoServer - HTTP server speaking the /process/localize API, for
+                    running the real SDK against (api_url=server.url)
+"""
+import asyncio
+import json
+import random
+import threading
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+
+class StubEngine:
+    def __init__(self, latency=0.05, error_rate=0.0, seed=0):
+        self.latency = latency
+        self.error_rate = error_rate
+        self.calls = 0
+        self.in_flight = 0
+        self.max_in_flight = 0
+        self._rng = random.Random(seed)
+
+    async def __aenter__(self):
+        return self
+
+    async def __aexit__(self, exc_type, exc, tb):
+        pass
+
+    async def localize_text(self, text, params):
+        self.calls += 1
+        self.in_flight += 1
+        self.max_in_flight = max(self.max_in_flight, self.in_flight)
+        try:
+            await asyncio.sleep(self.latency)
+            if self._rng.random() < self.error_rate:
+                # Same shape as the SDK's transient errors
+                raise RuntimeError("Server error (503): Service Unavailable. Stub failure")
+            return f"[{params['target_locale']}] {text}"
+        finally:
+            self.in_flight -= 1
+
+
+class StubLingoServer:
+    """Answers POST /process/localize from a background thread after `latency` seconds."""
+
+    def __init__(self, latency=0.05, error_rate=0.0, seed=0, port=0):
+        self.latency = latency
+        self.error_rate = error_rate
+        self.requests = 0
+        self._rng = random.Random(seed)
+        self._lock = threading.Lock()
+        stub = self
+
+        class Handler(BaseHTTPRequestHandler):
+            def do_POST(self):
+                request = json.loads(self.rfile.read(int(self.headers.get('Content-Length', 0))))
+                with stub._lock:
+                    stub.requests += 1
+                    failed = stub._rng.random() < stub.error_rate
+                threading.Event().wait(stub.latency)
+                if failed:
+                    self._reply(503, {'error': 'Stub failure'})
+                else:
+                    locale = request['targetLocale']
+                    self._reply(200, {'data': {key: f"[{locale}] {value}" for key, value in request['data'].items()}})
+
+            def _reply(self, status, payload):
+                body = json.dumps(payload).encode('utf-8')
+                self.send_response(status)
+                self.send_header('Content-Type', 'application/json')
+                self.send_header('Content-Length', str(len(body)))
+                self.end_headers()
+                self.wfile.write(body)
+
+            def log_message(self, *args):
+                pass
+
+        self._server = ThreadingHTTPServer(('127.0.0.1', port), Handler)
+        self._server.daemon_threads = True
+        self.url = f"http://127.0.0.1:{self._server.server_port}"
+
+    def __enter__(self):
+        threading.Thread(target=self._server.serve_forever, daemon=True).start()
+        return self
+
+    def __exit__(self, exc_type, exc, tb):
+        self._server.shutdown()
+        self._server.server_close()
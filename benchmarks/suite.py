@@ -0,0 +1,205 @@
+"""
+Benchmark suite: offline corpus, local servers, JSON results.
+
+Runs microbenchmarks for page extraction (Crawler._extract_text), page
+analysis (Analyzer.analyze_page), language detection per backend and the
+batch translator (real SDK against the stub Lingo.dev server), plus a static
+crawl of the local corpus server. Results go to stdout or --output as JSON;
+--compare flags every *_per_s metric that dropped by more than --tolerance
+against a previous results file (exit code 1), so runs can be diffed across commits.
+
+    python -m benchmarks.suite [--pages 200] [--output results.json] [--compare baseline.json]
+"""
+import argparse
+import asyncio
+import json
+import logging
+import platform
+import subprocess
+import sys
+import time
+
+from lingodotdev import LingoDotDevEngine
+
+from benchmarks.corpus import CorpusServer, corpus_pages
+from benchmarks.stub_lingo import StubLingoServer
+from src.analyzer import Analyzer
+from src.crawler import Crawler
+from src.detection import BACKENDS, LanguageDetector, make_backend
+from src.extract import parse_html
+from src.lingo import LingoClient
+
+LANGUAGES = ['en', 'es', 'fr', 'de']
+
+
+def _best(fn, repeat):
+    """(best wall time, result) over `repeat` calls of fn()."""
+    best, result = float('inf'), None
+    for _ in range(repeat):
+        started = time.perf_counter()
+        result = fn()
+        best = min(best, time.perf_counter() - started)
+    return best, result
+
+
+def _rate(count, seconds):
+    return round(count / seconds, 1) if seconds else 0.0
+
+
+def _extracted_pages(pages):
+    crawler = Crawler('http://corpus.local/')
+    return [crawler._extract_text(parse_html(html), url) for url, html in pages]
+
+
+def bench_extract(pages, repeat):
+    seconds, extracted = _best(lambda: _extracted_pages(pages), repeat)
+    items = sum(len(page['items']) for page in extracted)
+    return {'pages': len(pages), 'items': items, 'seconds': round(seconds, 4),
+            'pages_per_s': _rate(len(pages), seconds), 'items_per_s': _rate(items, seconds)}
+
+
+def bench_analyze(extracted, backend, repeat):
+    def run():
+        # Fresh detector each time: a cold cache, like the first pages of a run
+        detector = LanguageDetector(backend=make_backend(backend, LANGUAGES))
+        analyzer = Analyzer(target_languages=['es'], detector=detector)
+        return [analyzer.analyze_page(page) for page in extracted]
+
+    seconds, results = _best(run, repeat)
+    strings = sum(len(page['items']) for page in extracted)
+    return {'backend': backend, 'pages': len(extracted), 'issues': sum(len(r['issues']) for r in results),
+            'seconds': round(seconds, 4), 'pages_per_s': _rate(len(extracted), seconds),
+            'strings_per_s': _rate(strings, seconds)}
+
+
+def bench_detection(texts, backend, repeat):
+    seconds, _ = _best(lambda: LanguageDetector(backend=make_backend(backend, LANGUAGES)).detect_many(texts), repeat)
+    return {'backend': backend, 'strings': len(texts), 'seconds': round(seconds, 4),
+            'strings_per_s': _rate(len(texts), seconds)}
+
+
+async def _translate(texts, concurrency, api_url):
+    client = LingoClient(
+        api_key='stub', concurrency=concurrency,
+        engine_factory=lambda: LingoDotDevEngine({'api_key': 'stub', 'api_url': api_url}),
+    )
+    async with client:
+        started = time.perf_counter()
+        results = await client.suggest_translation_batch(texts, 'es')
+        return time.perf_counter() - started, results, client.stats
+
+
+def bench_translate(texts, concurrency, latency):
+    with StubLingoServer(latency=latency) as server:
+        seconds, results, stats = asyncio.run(_translate(texts, concurrency, server.url))
+    return {'strings': len(texts), 'translated': len(results), 'concurrency': concurrency, 'latency_s': latency,
+            'seconds': round(seconds, 4), 'strings_per_s': _rate(len(texts), seconds), 'client': stats}
+
+
+def bench_crawl(pages, concurrency, latency):
+    with CorpusServer(pages=pages, latency=latency) as server:
+        crawler = Crawler(f"{server.url}/es/p0", max_pages=pages, concurrency=concurrency, crawl_mode='static')
+        started = time.perf_counter()
+        crawled = asyncio.run(crawler.run())
+        seconds = time.perf_counter() - started
+    return {'pages': len(crawled), 'concurrency': concurrency, 'server_latency_s': latency,
+            'seconds': round(seconds, 4), 'pages_per_s': _rate(len(crawled), seconds)}
+
+
+def _available_backends():
+    available = []
+    for name in BACKENDS:
+        try:
+            BACKENDS[name]()
+        except ImportError:
+            continue
+        available.append(name)
+    return available
+
+
+def _commit():
+    try:
+        return subprocess.run(['git', 'rev-parse', '--short', 'HEAD'], capture_output=True, text=True).stdout.strip()
+    except OSError:
+        return None
+
+
+def _workload(args):
+    """Arguments that change what is measured (not where the results go)."""
+    return {key: value for key, value in args.items() if key not in ('output', 'compare', 'tolerance')}
+
+
+def compare(results, baseline, tolerance):
+    """[(benchmark, metric, old, new)] for every *_per_s metric that dropped by more than `tolerance`."""
+    regressions = []
+    for name, metrics in results['results'].items():
+        old_metrics = baseline.get('results', {}).get(name, {})
+        for metric, value in metrics.items():
+            old = old_metrics.get(metric)
+            if metric.endswith('_per_s') and old and value < old * (1 - tolerance):
+                regressions.append((name, metric, old, value))
+    return regressions
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    parser.add_argument('--pages', type=int, default=200, help='corpus pages for extract/analyze')
+    parser.add_argument('--crawl-pages', type=int, default=100)
+    parser.add_argument('--crawl-concurrency', type=int, default=5)
+    parser.add_argument('--server-latency', type=float, default=0.0, help='corpus server delay per page (s)')
+    parser.add_argument('--texts', type=int, default=500, help='strings for the translation benchmark')
+    parser.add_argument('--translate-concurrency', type=int, default=10)
+    parser.add_argument('--translate-latency', type=float, default=0.02, help='stub Lingo.dev delay per request (s)')
+    parser.add_argument('--repeat', type=int, default=3)
+    parser.add_argument('--output', help='write the JSON results here instead of stdout')
+    parser.add_argument('--compare', help='previous results file to check for regressions')
+    parser.add_argument('--tolerance', type=float, default=0.1, help='allowed drop in *_per_s before failing')
+    args = parser.parse_args()
+
+    logging.disable(logging.WARNING)
+    pages = corpus_pages(args.pages)
+    extracted = _extracted_pages(pages)
+    texts = list({item['text'] for page in extracted for item in page['items']})
+    backends = _available_backends()
+
+    results = {'extract': bench_extract(pages, args.repeat)}
+    for backend in backends:
+        results[f'analyze_page[{backend}]'] = bench_analyze(extracted, backend, args.repeat)
+        results[f'detection[{backend}]'] = bench_detection(texts, backend, args.repeat)
+    results['translate_batch'] = bench_translate(
+        [f"{text} #{i}" for i, text in enumerate((texts * (args.texts // len(texts) + 1))[:args.texts])],
+        args.translate_concurrency, args.translate_latency,
+    )
+    results['crawl_static'] = bench_crawl(args.crawl_pages, args.crawl_concurrency, args.server_latency)
+
+    report = {
+        'meta': {
+            'commit': _commit(),
+            'python': platform.python_version(),
+            'platform': platform.platform(),
+            'timestamp': time.strftime('%Y-%m-%dT%H:%M:%SZ', time.gmtime()),
+            'args': vars(args),
+        },
+        'results': results,
+    }
+    output = json.dumps(report, indent=2)
+    if args.output:
+        with open(args.output, 'w') as f:
+            f.write(output + '\n')
+    else:
+        print(output)
+
+    if args.compare:
+        with open(args.compare) as f:
+            baseline = json.load(f)
+        if _workload(baseline.get('meta', {}).get('args', {})) != _workload(vars(args)):
+            print("warning: baseline was run with different arguments, rates may not be comparable", file=sys.stderr)
+        regressions = compare(report, baseline, args.tolerance)
+        for name, metric, old, new in regressions:
+            print(f"REGRESSION {name}.{metric}: {old} -> {new} ({new / old - 1:+.0%})", file=sys.stderr)
+        if regressions:
+            sys.exit(1)
+
+
+if __name__ == '__main__':
+    main()
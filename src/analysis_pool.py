@@ -0,0 +1,67 @@
+from apify import Actor
+import asyncio
+import multiprocessing
+import os
+from concurrent.futures import ProcessPoolExecutor
+from src.detection import Detection, make_backend
+
+# Strings per job: large enough to amortize pickling, small enough to spread one big page over all workers
+CHUNK_SIZE = 256
+
+# Per-process detection backend, built once by the pool initializer
+_backend = None
+
+
+def _init_worker(backend_name, languages):
+    global _backend
+    _backend = make_backend(backend_name, languages)
+
+
+def _detect_chunk(texts):
+    """Runs in a worker. Returns flat (lang, confidence) pairs, the compact form sent back to the loop."""
+    return [(lang, round(confidence, 4)) for lang, confidence in _backend.detect_batch(texts)]
+
+
+def default_workers():
+    """One worker per core the process may use, keeping one core for the event loop and the browser."""
+    try:
+        cores = len(os.sched_getaffinity(0))
+    except AttributeError:
+        cores = os.cpu_count() or 1
+    return max(0, cores - 1)
+
+
+class AnalysisPool:
+    """
+    Process pool for the CPU-bound part of analysis, language detection. Each
+    worker loads the detection backend once; detect() splits a list of
+    (already normalized, unique) strings into chunks, fans them out and
+    returns the detections in input order without blocking the event loop.
+    """
+
+    def __init__(self, backend_name, languages, workers):
+        self.workers = workers
+        # spawn: forking a process that runs Playwright and an event loop is not safe
+        self._executor = ProcessPoolExecutor(
+            max_workers=workers,
+            mp_context=multiprocessing.get_context('spawn'),
+            initializer=_init_worker,
+            initargs=(backend_name, languages),
+        )
+        Actor.log.info(f"Analysis pool: {workers} worker processes ({backend_name})")
+
+    async def __aenter__(self):
+        return self
+
+    async def __aexit__(self, exc_type, exc, tb):
+        self.close()
+
+    def close(self):
+        self._executor.shutdown(wait=False, cancel_futures=True)
+
+    async def detect(self, texts):
+        """[Detection] for `texts`, computed in the worker processes."""
+        loop = asyncio.get_running_loop()
+        chunks = [texts[start:start + CHUNK_SIZE] for start in range(0, len(texts), CHUNK_SIZE)]
+        results = await asyncio.gather(*(loop.run_in_executor(self._executor, _detect_chunk, chunk) for chunk in chunks))
+        return [Detection(lang, confidence) for chunk in results for lang, confidence in chunk]
@@ -1,106 +1,209 @@
-from langdetect import detect, DetectorFactory, LangDetectException
-import re
+from apify import Actor
+from src.detection import LanguageDetector, normalize_language
+from src import placeholders
+from src.short_strings import AMBIGUOUS, BASE, ShortStringVerifier
+from src.string_index import SiteStringIndex
 
-DetectorFactory.seed = 0
+# Minimum detector confidence to report a long string as fallback/mixed outright.
+# Below it the mismatch is only flagged as suspected_mixed for verification.
+CONFIDENT_DETECTION = 0.8
+# Strings this short are checked by the ShortStringVerifier instead of the detector
+SHORT_TEXT_MAX = 15
 
 class Analyzer:
-    def __init__(self, target_languages, base_language='en'):
+    def __init__(self, target_languages, base_language='en', detector=None, scan_state=None, short_strings=None):
         self.target_languages = target_languages
-        self.base_language = base_language
+        # Compared with detector labels, so 'en-US' and 'en' must be the same language
+        self.base_language = normalize_language(base_language)
+        self.detector = detector or LanguageDetector()
+        # Local word list / trigram checks for short UI strings, plus the brand/term allowlist
+        self.short_strings = short_strings or ShortStringVerifier(base_language)
+        # Optional ScanState: verdicts for unchanged pages come from the previous run
+        self.scan_state = scan_state
 
     def detect_language(self, text):
-        try:
-            return detect(text)
-        except LangDetectException:
-            return None
+        return self.detector.detect(text).lang
+
+    def prepare(self, pages):
+        """Batch-detects every unique item text of the crawl up front so analyze_page only hits the cache."""
+        self.detector.detect_many({
+            item['text'] for page in pages if not self._replayable(page) for item in page['items']
+        })
+
+    def _replayable(self, page):
+        return page.get('cached') and self.scan_state is not None and self.scan_state.reuse_analysis
+
+    def detection_texts(self, page, expected_language=None):
+        """Every text analyze_new_strings() will run detection on for this page."""
+        texts = [] if self._replayable(page) else [item['text'] for item in page['items']]
+        if not expected_language:
+            texts.append(self._page_blob(page['items']))
+        return texts
+
+    @staticmethod
+    def _page_blob(items):
+        return " ".join([item['text'] for item in items])[:1000] # Detect from first 1000 chars
+
+    def page_language(self, items):
+        detected_page_lang = self.detect_language(self._page_blob(items))
+        
+        # If detection fails, assume base val
+        return detected_page_lang if detected_page_lang else self.base_language
 
     def analyze_page(self, page_data):
         """Analyzes a single page's data for localization issues."""
+        current_page_lang = self.page_language(page_data['items'])
+        
+        issues = []
+        for item in page_data['items']:
+            issues.extend(self.check_item(item, current_page_lang))
+
+        return {
+            'url': page_data['url'],
+            'detected_language': current_page_lang,
+            'issues': issues
+        }
+
+    def analyze_site(self, pages, expected_language=None):
+        """
+        Analyzes a whole crawl with shared template text (nav, footer, buttons)
+        checked once: each unique (text, type) per page language is analyzed a
+        single time and its issues carry `occurrences` and the `urls` it was seen on.
+        For a locale crawl, `expected_language` replaces per-page detection.
+        """
+        index = SiteStringIndex()
+        page_languages = []
         issues = []
+        for page in pages:
+            current_page_lang, new_issues = self.analyze_new_strings(page, index, expected_language)
+            page_languages.append({'url': page['url'], 'detected_language': current_page_lang})
+            issues.extend(new_issues)
         
-        page_text_blob = " ".join([item['text'] for item in page_data['items']])
-        detected_page_lang = self.detect_language(page_text_blob[:1000]) # Detect from first 1000 chars
+        for issue in issues:
+            issue['occurrences'] = len(issue['urls'])
+
+        Actor.log.info(f"Analyzed {len(index)} unique strings from {index.total_items} items on {len(pages)} pages")
+        return {
+            'pages': page_languages,
+            'issues': issues
+        }
+
+    def analyze_new_strings(self, page, index, expected_language=None):
+        """
+        Incremental form of analyze_site: adds one page to `index` and checks only
+        the strings it has not seen before. Returns (page language, new issues).
+        The issues share their `urls` list with the index, so later pages still count.
+        """
+        current_page_lang = normalize_language(expected_language) or self.page_language(page['items'])
+        replay = self._replayable(page)
+        issues = []
+        for item, urls in index.add_page(page['url'], page['items'], current_page_lang):
+            if replay:
+                item_issues = self.replay_item(item, current_page_lang)
+            else:
+                item_issues = self.check_item(item, current_page_lang)
+            if self.scan_state is not None:
+                self.scan_state.remember(item['text'], current_page_lang, item_issues)
+            for issue in item_issues:
+                issue['url'] = urls[0]
+                issue['urls'] = urls
+                issue['occurrences'] = len(urls)
+                issues.append(issue)
+        return current_page_lang, issues
+
+    def check_item(self, item, current_page_lang):
+        """Runs every check on one extracted item against the language of the page it came from."""
+        issues = []
+        text = item['text']
+        key = item.get('key') # Extract key
+        # Locale codes come from user input and hreflang ('es-ES', 'zh-TW'); detector labels are normalized too
+        current_page_lang = normalize_language(current_page_lang)
+        item_lang, item_confidence = self.detector.detect(text)
         
-        # If detection fails, assume base val
-        current_page_lang = detected_page_lang if detected_page_lang else self.base_language
+        # 1. Broken Placeholders
+        broken = self._has_broken_placeholders(text)
+        if broken:
+            issues.append({
+                'type': 'broken_placeholder',
+                'text': text,
+                'key': key, # Pass key
+                'severity': 'high', 
+                'context': item['context'],
+                'details': broken
+            })
+
+        # 2. Mixed Language / Fallback Detection
         
-        for item in page_data['items']:
-            text = item['text']
-            key = item.get('key') # Extract key
-            item_lang = self.detect_language(text)
-            
-            # 1. Broken Placeholders
-            if self._has_broken_placeholders(text):
+        # A. Confident Mismatch (Long text, lang detected, mismatch)
+        if len(text) > SHORT_TEXT_MAX and item_lang and item_lang != current_page_lang and item_confidence >= CONFIDENT_DETECTION:
+             if item_lang == 'en' and current_page_lang != 'en':
+                 issues.append({
+                    'type': 'fallback_text',
+                    'text': text,
+                    'key': key,
+                    'severity': 'medium',
+                    'context': item['context'],
+                    'confidence': round(item_confidence, 3)
+                 })
+             else:
+                 issues.append({
+                    'type': 'mixed_language',
+                    'text': text,
+                    'key': key,
+                    'severity': 'medium',
+                    'context': item['context'],
+                    'confidence': round(item_confidence, 3),
+                    'details': f'Detected {item_lang} on {current_page_lang} page'
+                 })
+        
+        # B. Suspected Mixed (long text the detector isn't sure about)
+        elif len(text) > SHORT_TEXT_MAX and item_lang and item_lang != current_page_lang:
+             issues.append({
+                'type': 'suspected_mixed',
+                'text': text,
+                'key': key,
+                'severity': 'low',
+                'context': item['context']
+             })
+        
+        # C. Short text (UI elements) on a non-base page
+        # langdetect is flaky on short text ("Login" -> "it"), so these go through
+        # the local verifier (which also applies the brand/term allowlist); only
+        # strings it cannot place are flagged for review.
+        elif 3 < len(text) <= SHORT_TEXT_MAX and current_page_lang != self.base_language:
+            verdict, reason = self.short_strings.verify(text, current_page_lang)
+            if verdict == BASE:
                 issues.append({
-                    'type': 'broken_placeholder',
+                    'type': 'fallback_text',
                     'text': text,
-                    'key': key, # Pass key
-                    'severity': 'high', 
-                    'context': item['context']
+                    'key': key,
+                    'severity': 'medium',
+                    'context': item['context'],
+                    'details': reason
                 })
-
-            # 2. Mixed Language / Fallback Detection
-            
-            # A. Confident Mismatch (Long text, lang detected, mismatch)
-            if len(text) > 15 and item_lang and item_lang != current_page_lang:
-                 if item_lang == 'en' and current_page_lang != 'en':
-                     issues.append({
-                        'type': 'fallback_text',
-                        'text': text,
-                        'key': key,
-                        'severity': 'medium',
-                        'context': item['context']
-                     })
-                 else:
-                     issues.append({
-                        'type': 'mixed_language',
-                        'text': text,
-                        'key': key,
-                        'severity': 'medium',
-                        'context': item['context'],
-                        'details': f'Detected {item_lang} on {current_page_lang} page'
-                     })
-            
-            # B. Suspected Mixed (Short text, UI elements, flaky detection)
-            # If text is short (< 15) AND we are on a non-English page
-            # We suspect it might be English if it's not explicitly matching current lang
-            elif len(text) <= 15 and len(text) > 3 and current_page_lang != 'en':
-                # We flag this for verification.
-                # Optimization: If langdetect says it matches page lang, we trust it?
-                # langdetect is flaky on short text. "Login" -> "it". 
-                # So we should verify EVERYTHING short unless we are very sure.
-                # Let's verify anything short (>3 chars) on non-English pages.
-                
-                 issues.append({
+            elif verdict == AMBIGUOUS:
+                issues.append({
                     'type': 'suspected_mixed',
                     'text': text,
                     'key': key,
                     'severity': 'low',
-                    'context': item['context']
-                 })
+                    'context': item['context'],
+                    **({'details': reason} if reason else {})
+                })
 
-            # 3. Missing Translation (Heuristic: same as fallback really, or if we had a reference)
-            # For MVP without a reference JSON, "Missing Translation" is hard to distinguish from "Fallback".
-            # We will treat "English text on non-English page" as the primary "Missing Translation" candidate.
+        # 3. Missing Translation (Heuristic: same as fallback really, or if we had a reference)
+        # For MVP without a reference JSON, "Missing Translation" is hard to distinguish from "Fallback".
+        # We will treat "English text on non-English page" as the primary "Missing Translation" candidate.
 
-        return {
-            'url': page_data['url'],
-            'detected_language': current_page_lang,
-            'issues': issues
-        }
+        return issues
+
+    def replay_item(self, item, current_page_lang):
+        """check_item for an unchanged page: the previous run's verdicts for this text, no detection."""
+        return [
+            {'text': item['text'], 'key': item.get('key'), 'context': item['context'], **verdict}
+            for verdict in self.scan_state.verdict(item['text'], current_page_lang)
+        ]
 
     def _has_broken_placeholders(self, text):
-        # Checks for things like {{name, %s with missing parts, etc.
-        # Simple regex for broken handlebars or printf
-        # e.g. {{ name } (missing closing brace)
-        # This is tricky without knowing the exact syntax.
-        # Let's look for common patterns.
-        
-        # Unbalanced braces
-        if text.count('{') != text.count('}'):
-            return True
-        if text.count('%') > 0 and not re.search(r'%[sfd@]', text): # suspicious single %
-             # Not perfect, but MVP check
-             pass
-             
-        return False
+        """What is wrong with the string's placeholders (unbalanced ICU / handlebars braces), or None."""
+        return placeholders.tokenize(text).broken
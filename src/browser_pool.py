@@ -0,0 +1,252 @@
+from apify import Actor
+import asyncio
+import os
+from contextlib import asynccontextmanager
+from playwright.async_api import async_playwright
+from src.metrics import metrics
+from src.scheduler import RetryableError
+
+# Navigations per browser context before it is replaced by a fresh one
+DEFAULT_RECYCLE_AFTER = 100
+# Browser memory is sampled every this many navigations (reading /proc is cheap, not free)
+MEMORY_CHECK_EVERY = 10
+# Chromium process names (full build and headless shell)
+BROWSER_PROCESS_PREFIXES = ('chrom', 'headless_shell')
+
+# Error texts Playwright uses once the page, context or browser behind an object is gone
+CRASH_MESSAGES = ('Target closed', 'Target page, context or browser has been closed', 'Browser has been closed',
+                  'Page crashed', 'Browser closed', 'Connection closed')
+
+
+class BrowserCrashed(RetryableError):
+    """The page's renderer or the whole browser died mid-navigation; the URL is worth another try."""
+
+
+class BrowserLaunchError(Exception):
+    """Chromium could not be started (missing executable, out of memory). Fatal for the run, never retried."""
+
+
+def browser_rss_mb():
+    """
+    Resident memory of the Chromium processes started by this process, in MB.
+    Linux only (reads /proc); None elsewhere.
+    """
+    try:
+        pids = [int(name) for name in os.listdir('/proc') if name.isdigit()]
+    except OSError:
+        return None
+    children = {}
+    info = {}
+    for pid in pids:
+        try:
+            with open(f'/proc/{pid}/stat') as f:
+                stat = f.read()
+        except OSError:
+            continue
+        # pid (comm) state ppid ... rss is the 24th field; comm may contain spaces
+        comm = stat[stat.index('(') + 1:stat.rindex(')')]
+        fields = stat[stat.rindex(')') + 2:].split()
+        children.setdefault(int(fields[1]), []).append(pid)
+        info[pid] = (comm, int(fields[21]))
+
+    page_size = os.sysconf('SC_PAGE_SIZE')
+    total = 0
+    pending = list(children.get(os.getpid(), []))
+    while pending:
+        pid = pending.pop()
+        pending.extend(children.get(pid, []))
+        comm, rss = info.get(pid, ('', 0))
+        if comm.startswith(BROWSER_PROCESS_PREFIXES):
+            total += rss * page_size
+    return total / 1024 / 1024
+
+
+async def _close_quietly(target):
+    try:
+        await target.close()
+    except Exception:
+        pass
+
+
+class BrowserManager:
+    """
+    Owns Playwright and one Chromium for the run, shared by every crawler. The
+    browser is launched on first use and relaunched transparently when it has
+    died; `generation` changes on every launch so pools know their contexts are gone.
+    """
+
+    def __init__(self):
+        self._playwright = None
+        self._browser = None
+        self._lock = asyncio.Lock()
+        self.generation = 0
+        self.restarts = 0
+
+    async def __aenter__(self):
+        self._playwright = await async_playwright().start()
+        return self
+
+    async def __aexit__(self, exc_type, exc, tb):
+        if self._browser is not None:
+            await _close_quietly(self._browser)
+        await self._playwright.stop()
+
+    def is_connected(self):
+        return self._browser is not None and self._browser.is_connected()
+
+    async def get(self):
+        """(browser, generation), relaunching Chromium if it is not connected any more."""
+        async with self._lock:
+            if not self.is_connected():
+                if self._browser is not None:
+                    self.restarts += 1
+                    metrics.count('browser_restarts')
+                    Actor.log.warning(f"Browser disconnected, relaunching (restart #{self.restarts})")
+                try:
+                    self._browser = await self._playwright.chromium.launch(headless=True)
+                except Exception as e:
+                    raise BrowserLaunchError(f"Could not launch Chromium: {str(e).splitlines()[0] if str(e) else type(e).__name__}") from e
+                self.generation += 1
+            return self._browser, self.generation
+
+
+class PagePool:
+    """
+    Reusable tabs in one browser context, for one crawler.
+
+    `page()` leases an idle tab (or opens one) and always gets it back: healthy
+    tabs return to the pool, tabs that errored are closed. The context is
+    replaced after `recycle_after` navigations, or when Chromium's memory is
+    over `memory_limit_mb`; the old one closes once its last leased tab is back.
+    `setup_context(context)` is applied to every new context (request routing).
+    """
+
+    def __init__(self, manager, setup_context=None, recycle_after=DEFAULT_RECYCLE_AFTER, memory_limit_mb=None):
+        self.manager = manager
+        self.setup_context = setup_context
+        self.recycle_after = recycle_after
+        self.memory_limit_mb = memory_limit_mb
+        self._context = None
+        self._generation = None
+        self._navigations = 0
+        self._idle = []
+        self._leased = {}
+        self._crashed = set()
+        self._lock = asyncio.Lock()
+        self.stats = {'pages_opened': 0, 'pages_reused': 0, 'contexts_opened': 0, 'contexts_recycled': 0}
+
+    def _needs_recycle(self):
+        if self.recycle_after and self._navigations >= self.recycle_after:
+            return True
+        if self.memory_limit_mb and self._navigations % MEMORY_CHECK_EVERY == 0 and self._navigations:
+            rss = browser_rss_mb()
+            if rss is not None and rss > self.memory_limit_mb:
+                Actor.log.info(f"Browser uses {rss:.0f} MB (limit {self.memory_limit_mb} MB), recycling its context")
+                return True
+        return False
+
+    async def _retire_context(self):
+        context, self._context = self._context, None
+        for page in self._idle:
+            await _close_quietly(page)
+        self._idle = []
+        if not self._leased.get(context):
+            self._leased.pop(context, None)
+            await _close_quietly(context)
+
+    async def _current_context(self):
+        browser, generation = await self.manager.get()
+        if self._context is not None and (generation != self._generation or self._needs_recycle()):
+            if generation == self._generation:
+                self.stats['contexts_recycled'] += 1
+            await self._retire_context()
+        if self._context is None:
+            context = await browser.new_context()
+            if self.setup_context is not None:
+                try:
+                    await self.setup_context(context)
+                except Exception:
+                    await _close_quietly(context)
+                    raise
+            self._context = context
+            self._generation = generation
+            self._navigations = 0
+            self.stats['contexts_opened'] += 1
+        return self._context
+
+    async def _acquire(self):
+        with metrics.timer('new_page'):
+            return await self._acquire_page()
+
+    async def _acquire_page(self):
+        async with self._lock:
+            context = await self._current_context()
+            page = None
+            while self._idle and page is None:
+                candidate = self._idle.pop()
+                if candidate.is_closed():
+                    continue
+                page = candidate
+                self.stats['pages_reused'] += 1
+            if page is None:
+                try:
+                    page = await context.new_page()
+                except Exception:
+                    # A context that cannot open tabs is gone; the next lease starts a fresh one
+                    await self._retire_context()
+                    raise
+                page.on('crash', self._crashed.add)
+                self.stats['pages_opened'] += 1
+            self._navigations += 1
+            self._leased[context] = self._leased.get(context, 0) + 1
+            return context, page
+
+    async def _release(self, context, page, healthy):
+        self._leased[context] -= 1
+        if healthy and context is self._context and not page.is_closed() and page not in self._crashed:
+            self._idle.append(page)
+        else:
+            self._crashed.discard(page)
+            await _close_quietly(page)
+        if context is not self._context and not self._leased[context]:
+            del self._leased[context]
+            await _close_quietly(context)
+
+    def _is_crash(self, page, error):
+        if page in self._crashed:
+            return True
+        # A browser that never launched has not crashed; get() reports that as BrowserLaunchError
+        if self.manager.generation and not self.manager.is_connected():
+            return True
+        return any(message in str(error) for message in CRASH_MESSAGES)
+
+    @staticmethod
+    def _crashed_error(error):
+        return BrowserCrashed(str(error).splitlines()[0] if str(error) else type(error).__name__)
+
+    @asynccontextmanager
+    async def page(self):
+        # Opening a context or tab on a dead browser is a crash like any other: retried, not a failed page
+        try:
+            context, page = await self._acquire()
+        except BrowserLaunchError:
+            raise
+        except Exception as e:
+            if self._is_crash(None, e):
+                raise self._crashed_error(e) from e
+            raise
+        healthy = False
+        try:
+            yield page
+            healthy = True
+        except Exception as e:
+            if self._is_crash(page, e):
+                raise self._crashed_error(e) from e
+            raise
+        finally:
+            await self._release(context, page, healthy)
+
+    async def close(self):
+        async with self._lock:
+            if self._context is not None:
+                await self._retire_context()
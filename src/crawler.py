@@ -1,150 +1,370 @@
 from apify import Actor
-from playwright.async_api import async_playwright
-from bs4 import BeautifulSoup
+from playwright.async_api import TimeoutError as PlaywrightTimeoutError
 import asyncio
+import httpx
+import time
 from urllib.parse import urljoin, urlparse
+from src.browser_pool import DEFAULT_RECYCLE_AFTER, BrowserLaunchError, BrowserManager, PagePool
+from src.discovery import MAX_SITEMAP_URLS, UrlFilter, discover
+from src.extract import BROWSER_EXTRACT_SCRIPT, extract_items, items_from_browser, parse_html
+from src.fetch import StaticFetcher, make_route_handler
+from src.frontier import Frontier, normalize_url
+from src.metrics import metrics
+from src.scheduler import THROTTLE_STATUSES, HostScheduler, RetryableError, Throttled, parse_retry_after
+
+# Share of the rendered page's text that the raw HTML must contain for 'auto' to pick 'static'
+STATIC_COVERAGE_THRESHOLD = 0.9
+# Times a URL is put back on the frontier after a retryable failure (429/503, timeout,
+# browser crash) before it counts as failed
+MAX_RETRIES = 3
+# Sitemap URLs kept per page of maxPages: enough choice for the priority order, not the whole site
+SITEMAP_SEEDS_PER_PAGE = 5
 
 class Crawler:
-    def __init__(self, start_url, max_pages=5):
+    def __init__(self, start_url, max_pages=5, concurrency=1, priority_patterns=None, by_depth=False,
+                 extraction_mode='browser', crawl_mode='full', block_third_party=False, scope=None,
+                 on_page=None, scan_state=None, scheduler=None, use_sitemaps=False, respect_robots=True,
+                 include_patterns=None, exclude_patterns=None, recycle_after=DEFAULT_RECYCLE_AFTER,
+                 browser_memory_limit_mb=None):
         self.start_url = start_url
+        # Optional path prefix (e.g. '/es/') that links must stay under, used by locale crawls
+        self.scope = scope
         self.max_pages = max_pages
+        self.concurrency = max(1, concurrency)
+        # 'browser' runs the extractor inside the page; 'python' parses page.content() with BeautifulSoup
+        self.extraction_mode = extraction_mode
+        # See src/fetch.py for the crawl profiles
+        self.crawl_mode = crawl_mode
+        self.block_third_party = block_third_party
+        self.frontier = Frontier(priority_patterns=priority_patterns, by_depth=by_depth)
         self.visited_urls = set()
         self.crawled_data = []
+        # Optional async callback that receives each page as it is crawled. When set,
+        # pages are streamed to it instead of being collected in crawled_data, and a
+        # slow consumer (bounded queue) naturally throttles the workers.
+        self.on_page = on_page
+        # Optional ScanState: unchanged pages since the previous run are replayed, not re-rendered
+        self.scan_state = scan_state
+        self._validator_fetcher = None
+        # Per-host adaptive concurrency; pass one in to share it between crawlers of the same run
+        self.scheduler = scheduler or HostScheduler(self.concurrency)
+        self.scheduler.register(start_url)
+        # robots.txt / sitemap discovery and include/exclude globs (see src/discovery.py)
+        self.use_sitemaps = use_sitemaps
+        self.respect_robots = respect_robots
+        self.include_patterns = include_patterns or []
+        self.exclude_patterns = exclude_patterns or []
+        self.url_filter = UrlFilter(include=self.include_patterns, exclude=self.exclude_patterns)
+        # Browser contexts are replaced after this many navigations or above this Chromium RSS
+        self.recycle_after = recycle_after
+        self.browser_memory_limit_mb = browser_memory_limit_mb
+        self._retries = {}
+        self.worker_stats = {}
 
-    async def run(self):
-        async with async_playwright() as p:
-            browser = await p.chromium.launch(headless=True)
-            context = await browser.new_context()
-            
-            queue = [self.start_url]
-            
-            while queue and len(self.visited_urls) < self.max_pages:
-                url = queue.pop(0)
-                if url in self.visited_urls:
+    async def run(self, browsers=None):
+        """Crawls from start_url. A shared BrowserManager may be passed in; it is left open for its owner."""
+        if browsers is None and self.crawl_mode != 'static':
+            # One browser for the 'auto' probe and the crawl (launched only if a page needs it)
+            async with BrowserManager() as browsers:
+                return await self.run(browsers)
+        if self.crawl_mode == 'auto':
+            self.crawl_mode = await self._probe_mode(browsers)
+        
+        # Shared frontier for all workers. It normalizes URLs and remembers
+        # everything it ever scheduled, so no page is rendered twice.
+        self.frontier.add(self.start_url)
+        await self._discover()
+        
+        if self.crawl_mode == 'static':
+            async with StaticFetcher(concurrency=self.concurrency) as fetcher:
+                await self._run_workers(lambda worker_id, url: self._fetch_page(worker_id, fetcher, url))
+        elif self.scan_state is not None:
+            # Conditional HEAD requests tell which pages need a render at all
+            async with StaticFetcher(concurrency=self.concurrency) as self._validator_fetcher:
+                await self._run_browser(browsers)
+        else:
+            await self._run_browser(browsers)
+        
+        return self.crawled_data
+
+    async def _discover(self):
+        """Applies robots.txt and seeds the frontier from the sitemaps in one go."""
+        if not (self.use_sitemaps or self.respect_robots):
+            return
+        try:
+            with metrics.timer('discovery'):
+                self.url_filter, seeds = await discover(
+                    self.start_url, self.scheduler, self.use_sitemaps, self.respect_robots,
+                    self.include_patterns, self.exclude_patterns, self._in_scope,
+                    limit=min(MAX_SITEMAP_URLS, self.max_pages * SITEMAP_SEEDS_PER_PAGE),
+                )
+        except Exception as e:
+            Actor.log.warning(f"URL discovery failed for {self.start_url} ({e}), following links only")
+            return
+        added = self.frontier.add_many(seeds, 1)
+        metrics.count('urls_from_sitemaps', added)
+        if seeds:
+            Actor.log.info(f"Seeded {added} URLs from sitemaps for {self.start_url}")
+
+    async def _run_browser(self, browsers):
+        pool = PagePool(browsers, self._setup_context, self.recycle_after, self.browser_memory_limit_mb)
+        try:
+            await self._run_workers(lambda worker_id, url: self._crawl_page(worker_id, pool, url))
+        finally:
+            await pool.close()
+            Actor.log.info(f"Browser pool for {self.start_url}: {pool.stats}")
+            for name, value in pool.stats.items():
+                metrics.count(name, value)
+
+    async def _setup_context(self, context):
+        # 'auto' only while probing, which renders the way 'light' would
+        if self.crawl_mode in ('light', 'auto'):
+            await context.route('**/*', make_route_handler(self.start_url, self.block_third_party))
+
+    async def _run_workers(self, crawl_fn):
+        started = time.monotonic()
+        workers = [
+            asyncio.create_task(self._worker(worker_id, crawl_fn))
+            for worker_id in range(self.concurrency)
+        ]
+        # Workers only ever stop by raising (e.g. BrowserLaunchError), which ends the crawl
+        done = asyncio.ensure_future(self.frontier.join())
+        await asyncio.wait([done, *workers], return_when=asyncio.FIRST_COMPLETED)
+        done.cancel()
+        for worker in workers:
+            worker.cancel()
+        results = await asyncio.gather(*workers, return_exceptions=True)
+        for result in results:
+            if isinstance(result, Exception):
+                raise result
+        
+        self._log_throughput(time.monotonic() - started)
+
+    async def _worker(self, worker_id, crawl_fn):
+        """Pulls URLs off the shared queue until the crawl is done. One tab (or request) per worker."""
+        stats = self.worker_stats.setdefault(worker_id, {'pages': 0, 'failed': 0, 'busy_seconds': 0.0})
+        
+        while True:
+            url, depth = await self.frontier.get()
+            try:
+                # Reserve the slot before awaiting anything so max_pages is exact
+                # even with several workers in flight.
+                if url in self.visited_urls or len(self.visited_urls) >= self.max_pages:
                     continue
-                
                 self.visited_urls.add(url)
-                Actor.log.info(f"Crawling: {url}")
                 
+                started = time.monotonic()
                 try:
-                    Actor.log.info(f"DEBUG: Opening new page")
-                    page = await context.new_page()
-                    Actor.log.info(f"DEBUG: Going to {url}")
-                    await page.goto(url, wait_until="domcontentloaded", timeout=60000)
-                    
-                    # Extract content
-                    Actor.log.info(f"DEBUG: Getting content")
-                    content = await page.content()
-                    Actor.log.info(f"DEBUG: Parsing soup")
-                    soup = BeautifulSoup(content, 'html.parser')
+                    links = await crawl_fn(worker_id, url)
+                except RetryableError as e:
+                    self._requeue(url, depth, e)
+                    continue
+                stats['busy_seconds'] += time.monotonic() - started
+                
+                metrics.observe('page', time.monotonic() - started)
+                
+                if links is None:
+                    stats['failed'] += 1
+                    metrics.count('pages_failed')
+                    continue
+                stats['pages'] += 1
+                metrics.count('pages_crawled')
+                
+                # Find links for next crawl
+                if len(self.visited_urls) < self.max_pages:
+                    self.frontier.add_many(links, depth + 1)
+            finally:
+                self.frontier.task_done()
+
+    def _requeue(self, url, depth, error):
+        """Puts a URL back on the frontier while its retry budget lasts."""
+        retries = self._retries.get(url, 0)
+        if retries >= MAX_RETRIES:
+            Actor.log.error(f"Giving up on {url} after {retries} retries: {error}")
+            metrics.count('pages_failed')
+            return
+        self._retries[url] = retries + 1
+        metrics.count('pages_throttled' if isinstance(error, Throttled) else 'pages_retried')
+        if not isinstance(error, Throttled):
+            Actor.log.warning(f"Retrying {url} later ({retries + 1}/{MAX_RETRIES}): {error}")
+        # Back on the queue (it is already in frontier.seen); a throttled host is paused meanwhile
+        self.visited_urls.discard(url)
+        self.frontier.put_nowait((url, depth))
+
+    async def _crawl_page(self, worker_id, pool, url):
+        """Renders one URL and stores its items. Returns the page links, or None on failure."""
+        validators = self.scan_state.validators(url) if self.scan_state is not None else {}
+        if validators:
+            async with self.scheduler.slot(url):
+                modified = await self._validator_fetcher.check_modified(url, validators)
+            if not modified:
+                return await self._replay(worker_id, url)
+        Actor.log.info(f"[worker {worker_id}] Crawling: {url}")
+        
+        try:
+            # The tab goes back to the pool (or is closed if anything failed) on the way out
+            async with pool.page() as page:
+                # The host slot covers the navigation only; extraction and the
+                # pipeline's back-pressure are not the host's latency
+                async with self.scheduler.slot(url):
+                    with metrics.timer('goto'):
+                        response = await page.goto(url, wait_until="domcontentloaded", timeout=60000)
+                    if response is not None and response.status in THROTTLE_STATUSES:
+                        raise Throttled(parse_retry_after(response.headers.get('retry-after')))
+                
+                if self.extraction_mode == 'browser':
+                    # Extract items and links inside the page, skipping invisible elements
+                    with metrics.timer('extract'):
+                        result = await page.evaluate(BROWSER_EXTRACT_SCRIPT)
+                        page_data = {'url': url, 'items': items_from_browser(result)}
+                        links = self._filter_links(result['links'], url)
+                else:
+                    with metrics.timer('content'):
+                        content = await page.content()
+                    with metrics.timer('parse'):
+                        soup = parse_html(content)
                     
                     # Extract visible text nodes, buttons, headings
-                    Actor.log.info(f"DEBUG: Extracting text")
-                    page_data = self._extract_text(soup, url)
-                    Actor.log.info(f"DEBUG: Text extracted, items: {len(page_data['items'])}")
-                    self.crawled_data.append(page_data)
-                    
-                    # Find links for next crawl
-                    if len(self.visited_urls) < self.max_pages:
-                        Actor.log.info(f"DEBUG: Getting links")
+                    with metrics.timer('extract'):
+                        page_data = self._extract_text(soup, url)
                         links = self._get_links(soup, url)
-                        for link in links:
-                            if link not in self.visited_urls and link not in queue:
-                                queue.append(link)
-                                
-                    await page.close()
-                    
-                except Exception as e:
-                    import traceback
-                    traceback.print_exc()
-                    Actor.log.error(f"Failed to crawl {url}: {e}")
             
-            await browser.close()
-        
-        return self.crawled_data
+            metrics.count('items_extracted', len(page_data['items']))
+            
+            headers = response.headers if response is not None else {}
+            self._record(page_data, links, (headers.get('etag'), headers.get('last-modified')))
+            await self._emit(page_data)
+            return links
+            
+        except (RetryableError, BrowserLaunchError):
+            raise
+        except PlaywrightTimeoutError as e:
+            raise RetryableError(str(e).splitlines()[0]) from e
+        except Exception as e:
+            import traceback
+            traceback.print_exc()
+            Actor.log.error(f"Failed to crawl {url}: {e}")
+            return None
 
-    def _extract_text(self, soup, url):
-        """Extracts visible text and categorizes it."""
-        extracted = []
+    async def _fetch_page(self, worker_id, fetcher, url):
+        """Static profile: plain HTTP fetch + BeautifulSoup, no browser."""
+        Actor.log.info(f"[worker {worker_id}] Fetching: {url}")
         
-        def get_key(tag, text):
-            """Generates a key from ID, Name, or Text."""
-            if tag.get('id'):
-                return tag['id']
-            if tag.get('name'):
-                return tag['name']
-            # Fallback to slugified text
-            slug = "".join(c if c.isalnum() else "_" for c in text[:30]).lower()
-            return slug.strip('_')
-
-        # 1. Buttons
-        for btn in soup.find_all(['button', 'a']):
-            text = btn.get_text(strip=True)
-            if text:
-                key = get_key(btn, text)
-                extracted.append({'type': 'button', 'text': text, 'key': key, 'context': str(btn)[:100]})
-
-        # 2. Headings
-        for h in soup.find_all(['h1', 'h2', 'h3', 'h4', 'h5', 'h6']):
-            text = h.get_text(strip=True)
-            if text:
-                key = get_key(h, text)
-                extracted.append({'type': 'heading', 'text': text, 'key': key, 'context': str(h)[:100]})
-
-        # 3. Label-like text
-        # 3. Text Blobs (Robust find_all approach)
-        # We capture text from common container tags. 
-        # Duplicates are handled by the dedup logic below.
-        for tag in soup.find_all(['label', 'span', 'p', 'div', 'li', 'td', 'th']):
-            text = tag.get_text(strip=True)
-            # Skip if empty or too long (likely code/params)
-            if not text or len(text) > 1000:
-                continue
-            
-            # Skip script/style parent content
-            if tag.parent.name in ['script', 'style', 'head', 'noscript']:
-                continue
+        try:
+            validators = self.scan_state.validators(url) if self.scan_state is not None else {}
+            async with self.scheduler.slot(url):
+                with metrics.timer('fetch'):
+                    final_url, html, response_validators = await fetcher.fetch_conditional(url, validators)
+            if html is None:
+                return await self._replay(worker_id, url)
+            with metrics.timer('parse'):
+                soup = parse_html(html)
+            with metrics.timer('extract'):
+                page_data = self._extract_text(soup, url)
+                links = self._get_links(soup, final_url)
+            metrics.count('items_extracted', len(page_data['items']))
+            self._record(page_data, links, response_validators)
+            await self._emit(page_data)
+            return links
+        except RetryableError:
+            raise
+        except httpx.TransportError as e:
+            # Timeouts and dropped connections; HTTP error statuses are final
+            raise RetryableError(str(e) or type(e).__name__) from e
+        except Exception as e:
+            Actor.log.error(f"Failed to fetch {url}: {e}")
+            return None
 
-            # Heuristic: If it has many children tags, it's likely a container, not a leaf text node.
-            # But we want to catch "Mixed content". 
-            # Let's try to capture it if it has text.
+    async def _probe_mode(self, browsers):
+        """
+        Picks 'static' when the server-rendered HTML already carries (nearly) all the
+        text the rendered page shows, otherwise 'light'. Costs one fetch and one render,
+        in a tab of the run's shared browser.
+        """
+        try:
+            async with StaticFetcher(concurrency=1) as fetcher:
+                _, html = await fetcher.fetch(self.start_url)
+            static_texts = {item['text'] for item in extract_items(parse_html(html))}
             
-            key = get_key(tag, text)
-            
-            # Simple typing based on tag
-            t_type = 'text'
-            if tag.name == 'label': t_type = 'label'
-            elif 'error' in str(tag.get('class', '')): t_type = 'error_message'
-            
-            extracted.append({'type': t_type, 'text': text, 'key': key, 'context': str(tag)[:100]})
-
-        # Dedup extracted items based on text+type
-        unique_extracted = []
-        seen = set()
-        for item in extracted:
-            # unique by text, but keep the best key if possible (id > name > slug)
-            # simpler: just dedupe by text for now to avoid noise
-            key_id = (item['type'], item['text'])
-            if key_id not in seen:
-                seen.add(key_id)
-                unique_extracted.append(item)
+            pool = PagePool(browsers, self._setup_context)
+            try:
+                async with pool.page() as page:
+                    await page.goto(self.start_url, wait_until="domcontentloaded", timeout=60000)
+                    result = await page.evaluate(BROWSER_EXTRACT_SCRIPT)
+            finally:
+                await pool.close()
+            rendered_texts = {item['text'] for item in items_from_browser(result)}
+        except BrowserLaunchError:
+            raise
+        except Exception as e:
+            Actor.log.warning(f"Crawl mode probe failed ({e}), using 'light'")
+            return 'light'
+        
+        coverage = len(static_texts & rendered_texts) / len(rendered_texts) if rendered_texts else 0.0
+        mode = 'static' if coverage >= STATIC_COVERAGE_THRESHOLD else 'light'
+        Actor.log.info(f"Crawl mode probe: static HTML covers {coverage:.0%} of rendered text -> '{mode}'")
+        return mode
+
+    def _record(self, page_data, links, validators):
+        """Saves the page to the scan state; marks it `cached` when its items did not change."""
+        if self.scan_state is not None:
+            etag, last_modified = validators
+            page_data['cached'] = self.scan_state.record(page_data['url'], page_data['items'], links, etag, last_modified)
+
+    async def _replay(self, worker_id, url):
+        """304 Not Modified: emits the items stored by the previous run and returns its links."""
+        Actor.log.info(f"[worker {worker_id}] Not modified: {url}")
+        metrics.count('pages_not_modified')
+        record = self.scan_state.reuse(url)
+        await self._emit({'url': url, 'items': record['items'], 'cached': True})
+        return record['links']
+
+    async def _emit(self, page_data):
+        if self.on_page is not None:
+            await self.on_page(page_data)
+        else:
+            self.crawled_data.append(page_data)
 
+    def _log_throughput(self, elapsed):
+        total_pages = sum(stats['pages'] for stats in self.worker_stats.values())
+        minutes = max(elapsed, 1e-6) / 60
+        Actor.log.info(
+            f"Crawl finished: {total_pages} pages in {elapsed:.1f}s "
+            f"({total_pages / minutes:.1f} pages/min, concurrency={self.concurrency})"
+        )
+        for worker_id, stats in sorted(self.worker_stats.items()):
+            busy_minutes = max(stats['busy_seconds'], 1e-6) / 60
+            Actor.log.info(
+                f"  worker {worker_id}: {stats['pages']} pages, {stats['failed']} failed, "
+                f"{stats['pages'] / busy_minutes:.1f} pages/min while busy"
+            )
+
+    def _extract_text(self, soup, url):
+        """Extracts visible text and categorizes it."""
         return {
             'url': url,
-            'items': unique_extracted
+            'items': extract_items(soup)
         }
 
+    def _in_scope(self, path):
+        return self.scope is None or path.startswith(self.scope) or path == self.scope.rstrip('/')
+
     def _get_links(self, soup, current_url):
-        links = []
+        return self._filter_links((a['href'] for a in soup.find_all('a', href=True)), current_url)
+
+    def _filter_links(self, hrefs, current_url):
+        links = {}
         base_domain = urlparse(self.start_url).netloc
         
-        for a in soup.find_all('a', href=True):
-            href = a['href']
+        for href in hrefs:
             full_url = urljoin(current_url, href)
             parsed = urlparse(full_url)
             
-            # Internal links only
-            if parsed.netloc == base_domain:
-                links.append(full_url)
+            # Internal links only, collapsed to their canonical form
+            # (#fragment, trailing slash and tracking-query variants are one page)
+            if parsed.netloc == base_domain and parsed.scheme in ('http', 'https') and self._in_scope(parsed.path):
+                url = normalize_url(full_url)
+                if url not in links and self.url_filter.allows(url):
+                    links[url] = None
         
-        return links
+        return list(links)
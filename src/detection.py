@@ -0,0 +1,160 @@
+from collections import OrderedDict, namedtuple
+from apify import Actor
+from src.locales import primary_subtag
+from src.metrics import metrics
+
+Detection = namedtuple('Detection', ['lang', 'confidence'])
+UNKNOWN = Detection(None, 0.0)
+
+# Legacy codes some detector models still emit, mapped to the current ones
+LANGUAGE_ALIASES = {'iw': 'he', 'in': 'id', 'jw': 'jv', 'nb': 'no'}
+
+
+def normalize_language(code):
+    """
+    Comparable language code for user input, hreflang and detector labels alike:
+    'es-ES' / 'zh-cn' / 'zh-TW' / 'iw' -> 'es' / 'zh' / 'zh' / 'he'. None stays None.
+    """
+    if not code:
+        return None
+    lang = primary_subtag(code)
+    return LANGUAGE_ALIASES.get(lang, lang)
+
+
+class DetectionBackend:
+    """Backend interface: detect one text, or many at once if the library can batch."""
+    name = 'base'
+
+    def detect(self, text):
+        raise NotImplementedError
+
+    def detect_batch(self, texts):
+        return [self.detect(text) for text in texts]
+
+
+class LangdetectBackend(DetectionBackend):
+    """The original langdetect detector. Slow (pure Python) but needs no model files."""
+    name = 'langdetect'
+
+    def __init__(self, languages=None):
+        # langdetect cannot be restricted to a language set, `languages` is ignored
+        from langdetect import DetectorFactory, detect_langs, LangDetectException
+        DetectorFactory.seed = 0
+        self._detect_langs = detect_langs
+        self._error = LangDetectException
+
+    def detect(self, text):
+        try:
+            best = self._detect_langs(text)[0]
+        except (self._error, IndexError):
+            return UNKNOWN
+        return Detection(normalize_language(best.lang), best.prob)
+
+
+class LangidBackend(DetectionBackend):
+    """py3langid: numpy naive Bayes with a bundled model, roughly 50-100x faster than langdetect."""
+    name = 'langid'
+
+    def __init__(self, languages=None):
+        from py3langid.langid import LanguageIdentifier, MODEL_DIR, MODEL_FILE
+        self._identifier = LanguageIdentifier.from_modelpath(MODEL_DIR / MODEL_FILE, norm_probs=True)
+        known = list(dict.fromkeys(
+            lang for lang in map(normalize_language, languages or []) if lang in self._identifier.labels
+        ))
+        if len(known) > 1:
+            self._identifier.set_languages(known)
+
+    def detect(self, text):
+        lang, prob = self._identifier.classify(text)
+        return Detection(normalize_language(lang), float(prob))
+
+
+BACKENDS = {
+    'langdetect': LangdetectBackend,
+    'langid': LangidBackend,
+}
+
+
+def make_backend(name='langdetect', languages=None):
+    """Builds a backend by name, falling back to langdetect if its library is missing."""
+    backend_cls = BACKENDS.get(name)
+    if backend_cls is None:
+        raise ValueError(f"Unknown detection backend '{name}' (choose from {', '.join(BACKENDS)})")
+    try:
+        return backend_cls(languages=languages)
+    except ImportError:
+        Actor.log.warning(f"Detection backend '{name}' is not installed, falling back to langdetect")
+        return LangdetectBackend()
+
+
+class LanguageDetector:
+    """
+    Memoizing front for a detection backend. Results are cached in an LRU keyed by
+    whitespace-normalized text, and detect_many() sends only the unseen unique
+    strings of a whole crawl to the backend in one batch.
+    """
+
+    def __init__(self, backend=None, cache_size=50000):
+        self.backend = backend or LangdetectBackend()
+        self.cache_size = cache_size
+        self._cache = OrderedDict()
+        self.hits = 0
+        self.misses = 0
+
+    @staticmethod
+    def _normalize(text):
+        return ' '.join(text.split())
+
+    def _remember(self, key, detection):
+        self._cache[key] = detection
+        if len(self._cache) > self.cache_size:
+            self._cache.popitem(last=False)
+
+    def detect(self, text):
+        key = self._normalize(text)
+        if not key:
+            return UNKNOWN
+        detection = self._cache.get(key)
+        if detection is not None:
+            self._cache.move_to_end(key)
+            self.hits += 1
+            return detection
+        self.misses += 1
+        with metrics.timer('detect'):
+            detection = self.backend.detect(key)
+        self._remember(key, detection)
+        return detection
+
+    def detect_many(self, texts):
+        """Detects every unique text in one backend batch. Returns {text: Detection}."""
+        keys = {text: self._normalize(text) for text in texts}
+        pending = list({key for key in keys.values() if key and key not in self._cache})
+        self.hits += len(keys) - len(pending)
+        self.misses += len(pending)
+        fresh = {}
+        if pending:
+            with metrics.timer('detect_batch'):
+                fresh = dict(zip(pending, self.backend.detect_batch(pending)))
+        for key, detection in fresh.items():
+            self._remember(key, detection)
+        return {text: fresh.get(key) or self._cache.get(key, UNKNOWN) for text, key in keys.items()}
+
+    def missing(self, texts):
+        """Normalized unique texts that are not cached yet, e.g. to detect them elsewhere (AnalysisPool)."""
+        return list({key for key in map(self._normalize, texts) if key and key not in self._cache})
+
+    def remember_many(self, keys, detections):
+        """Caches detections computed outside the detector for the normalized `keys` from missing()."""
+        self.misses += len(keys)
+        for key, detection in zip(keys, detections):
+            self._remember(key, detection)
+
+    def stats(self):
+        total = self.hits + self.misses
+        return {
+            'backend': self.backend.name,
+            'cached': len(self._cache),
+            'hits': self.hits,
+            'misses': self.misses,
+            'hit_rate': round(self.hits / total, 3) if total else 0.0,
+        }
@@ -0,0 +1,169 @@
+from apify import Actor
+import asyncio
+import gzip
+import io
+import httpx
+from lxml import etree
+from urllib.parse import urljoin, urlsplit
+from urllib.robotparser import RobotFileParser
+from src.fetch import USER_AGENT
+from src.frontier import url_matches
+from src.scheduler import THROTTLE_STATUSES, Throttled, parse_retry_after
+
+# Product token matched against robots.txt User-agent lines
+ROBOTS_AGENT = 'LocalizationHealthChecker'
+# Upper bounds for one discovery run: sitemap files read and page URLs kept
+MAX_SITEMAPS = 200
+MAX_SITEMAP_URLS = 50000
+SITEMAP_CONCURRENCY = 4
+SITEMAP_ATTEMPTS = 3
+# A Crawl-delay above this is treated as this (seconds)
+MAX_CRAWL_DELAY = 30.0
+
+
+class UrlFilter:
+    """robots.txt rules plus include/exclude globs; the crawler asks it about every URL it schedules."""
+
+    def __init__(self, robots=None, include=None, exclude=None):
+        self.robots = robots
+        self.include = list(include or [])
+        self.exclude = list(exclude or [])
+
+    def allows(self, url):
+        if self.include and not any(url_matches(url, pattern) for pattern in self.include):
+            return False
+        if any(url_matches(url, pattern) for pattern in self.exclude):
+            return False
+        return self.robots is None or self.robots.can_fetch(ROBOTS_AGENT, url)
+
+
+async def read_robots(client, start_url):
+    """
+    RobotFileParser for the start URL's host, or None (everything allowed) when
+    there is no readable robots.txt. 401/403 disallow everything, like
+    RobotFileParser.read() does.
+    """
+    robots_url = urljoin(start_url, '/robots.txt')
+    try:
+        response = await client.get(robots_url)
+    except httpx.HTTPError as e:
+        Actor.log.warning(f"Could not read {robots_url}: {e}")
+        return None
+    robots = RobotFileParser(robots_url)
+    if response.status_code in (401, 403):
+        robots.parse(['User-agent: *', 'Disallow: /'])
+    elif response.status_code >= 400:
+        return None
+    else:
+        robots.parse(response.text.splitlines())
+    return robots
+
+
+def parse_sitemap(data):
+    """
+    (is_index, [loc]) for a sitemap or sitemap index, gzipped or not. Parsed
+    incrementally so a 50 MB urlset never becomes a full tree.
+    """
+    if data[:2] == b'\x1f\x8b':
+        data = gzip.decompress(data)
+    is_index = None
+    locs = []
+    parser = etree.iterparse(
+        io.BytesIO(data), events=('start', 'end'), resolve_entities=False, no_network=True, recover=True,
+    )
+    for event, element in parser:
+        tag = etree.QName(element).localname
+        if event == 'start':
+            if is_index is None:
+                is_index = tag == 'sitemapindex'
+            continue
+        if tag == 'loc' and element.text:
+            locs.append(element.text.strip())
+        if tag in ('url', 'sitemap'):
+            element.clear()
+    return bool(is_index), locs
+
+
+async def read_sitemaps(client, sitemap_urls, scheduler, accept, limit=MAX_SITEMAP_URLS):
+    """
+    Page URLs from the given sitemaps, following sitemap indexes breadth-first.
+    Only URLs for which `accept(url)` is true are kept, at most `limit`; sitemaps
+    are fetched a few at a time, so reading stops once that many are found.
+    """
+    pending = list(dict.fromkeys(sitemap_urls))
+    seen = set(pending)
+    urls = {}
+    read = 0
+    semaphore = asyncio.Semaphore(SITEMAP_CONCURRENCY)
+
+    async def fetch(sitemap_url):
+        for attempt in range(SITEMAP_ATTEMPTS):
+            try:
+                async with semaphore, scheduler.slot(sitemap_url):
+                    response = await client.get(sitemap_url)
+                    if response.status_code in THROTTLE_STATUSES:
+                        raise Throttled(parse_retry_after(response.headers.get('retry-after')))
+                break
+            except Throttled:
+                if attempt == SITEMAP_ATTEMPTS - 1:
+                    raise
+        response.raise_for_status()
+        # Big urlsets take a while to parse; keep the loop free
+        return await asyncio.to_thread(parse_sitemap, response.content)
+
+    while pending and read < MAX_SITEMAPS and len(urls) < limit:
+        size = min(SITEMAP_CONCURRENCY, MAX_SITEMAPS - read)
+        batch, pending = pending[:size], pending[size:]
+        read += len(batch)
+        results = await asyncio.gather(*(fetch(sitemap_url) for sitemap_url in batch), return_exceptions=True)
+        for sitemap_url, result in zip(batch, results):
+            if isinstance(result, Exception):
+                Actor.log.warning(f"Skipping sitemap {sitemap_url}: {result}")
+                continue
+            is_index, locs = result
+            if is_index:
+                for loc in locs:
+                    if loc not in seen:
+                        seen.add(loc)
+                        pending.append(loc)
+                continue
+            for loc in locs:
+                if len(urls) >= limit:
+                    break
+                if accept(loc):
+                    urls.setdefault(loc, None)
+    Actor.log.info(f"Sitemaps: read {read}, kept {len(urls)} page URLs")
+    return list(urls)
+
+
+async def discover(start_url, scheduler, use_sitemaps=False, respect_robots=True, include=None, exclude=None,
+                   in_scope=None, limit=MAX_SITEMAP_URLS):
+    """
+    Reads robots.txt (rules, Crawl-delay, Sitemap: lines) and optionally the
+    sitemaps. Returns (UrlFilter, [seed URLs]). Sitemaps default to
+    /sitemap.xml when robots.txt lists none.
+    """
+    async with httpx.AsyncClient(follow_redirects=True, timeout=30.0, headers={'User-Agent': USER_AGENT}) as client:
+        robots = await read_robots(client, start_url) if respect_robots or use_sitemaps else None
+        url_filter = UrlFilter(robots if respect_robots else None, include, exclude)
+
+        if robots is not None and respect_robots:
+            delay = robots.crawl_delay(ROBOTS_AGENT)
+            if delay:
+                scheduler.set_min_delay(start_url, min(float(delay), MAX_CRAWL_DELAY))
+                Actor.log.info(f"robots.txt Crawl-delay for {urlsplit(start_url).hostname}: {delay}s")
+
+        if not use_sitemaps:
+            return url_filter, []
+
+        sitemap_urls = (robots.site_maps() if robots is not None else None) or [urljoin(start_url, '/sitemap.xml')]
+        host = urlsplit(start_url).netloc
+
+        def accept(url):
+            parts = urlsplit(url)
+            return (
+                parts.netloc == host and parts.scheme in ('http', 'https')
+                and (in_scope is None or in_scope(parts.path)) and url_filter.allows(url)
+            )
+
+        return url_filter, await read_sitemaps(client, sitemap_urls, scheduler, accept, limit)
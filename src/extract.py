@@ -0,0 +1,202 @@
+import json
+
+from bs4 import BeautifulSoup, NavigableString
+from bs4.element import PreformattedString
+
+try:
+    import lxml  # noqa: F401
+    HTML_PARSER = 'lxml'
+except ImportError:
+    HTML_PARSER = 'html.parser'
+
+# Elements whose whole text is one UI string, typed after the element.
+SEMANTIC_TYPES = {
+    'button': 'button', 'a': 'button',
+    'h1': 'heading', 'h2': 'heading', 'h3': 'heading',
+    'h4': 'heading', 'h5': 'heading', 'h6': 'heading',
+    'label': 'label',
+}
+# Block-ish containers that own the text directly inside them.
+CONTAINER_TAGS = {
+    'p', 'div', 'span', 'li', 'td', 'th', 'dt', 'dd', 'caption', 'figcaption',
+    'legend', 'summary', 'option', 'blockquote', 'section', 'article', 'main',
+    'header', 'footer', 'nav', 'aside', 'form', 'body',
+}
+SKIP_TAGS = {'script', 'style', 'head', 'noscript', 'template', 'svg', 'iframe', 'object'}
+
+MAX_TEXT_LENGTH = 1000
+CONTEXT_LENGTH = 100
+
+
+def parse_html(html):
+    return BeautifulSoup(html, HTML_PARSER)
+
+
+def make_key(tag, text):
+    """Generates a key from ID, Name, or Text."""
+    if tag.get('id'):
+        return tag['id']
+    if tag.get('name'):
+        return tag['name']
+    # Fallback to slugified text
+    slug = "".join(c if c.isalnum() else "_" for c in text[:30]).lower()
+    return slug.strip('_')
+
+
+def _is_hidden(tag):
+    attrs = tag.attrs
+    if 'hidden' in attrs or attrs.get('aria-hidden') == 'true':
+        return True
+    style = attrs.get('style')
+    return bool(style) and 'display:none' in style.replace(' ', '').lower()
+
+
+def _context(tag, text):
+    """Opening tag plus text, built from attributes instead of str(tag) so subtrees are never serialized."""
+    attrs = []
+    for name, value in tag.attrs.items():
+        if isinstance(value, list):
+            value = ' '.join(value)
+        attrs.append(f' {name}="{value}"')
+    return f"<{tag.name}{''.join(attrs)}>{text}"[:CONTEXT_LENGTH]
+
+
+def extract_items(soup):
+    """
+    Single pass over the DOM. Every text node is visited once and attached to its
+    owner: the nearest semantic ancestor (button/link/heading/label), which claims
+    its whole subtree, or otherwise the nearest container tag. Returns items in
+    document order, deduped by (type, text).
+    """
+    owners = []  # [tag, type, text parts] in the order owners were opened
+    stack = [(soup, None)]
+
+    while stack:
+        node, owner = stack.pop()
+
+        if isinstance(node, NavigableString):
+            if owner is not None and not isinstance(node, PreformattedString):
+                text = node.strip()
+                if text:
+                    owner[2].append(text)
+            continue
+
+        name = node.name
+        if name in SKIP_TAGS or (node is not soup and _is_hidden(node)):
+            continue
+
+        # Inside a semantic element everything belongs to it; otherwise a new
+        # semantic element or container takes over ownership.
+        if owner is None or owner[1] not in ('button', 'heading', 'label'):
+            if name in SEMANTIC_TYPES:
+                owner = [node, SEMANTIC_TYPES[name], []]
+                owners.append(owner)
+            elif name in CONTAINER_TAGS:
+                t_type = 'error_message' if 'error' in str(node.get('class', '')) else 'text'
+                owner = [node, t_type, []]
+                owners.append(owner)
+
+        # Reverse so the stack pops children in document order
+        stack.extend((child, owner) for child in reversed(node.contents))
+
+    return build_items(((tag, t_type, ' '.join(parts)) for tag, t_type, parts in owners if parts), _context)
+
+
+def build_items(entries, context_of):
+    """
+    Turns (source, type, text) owner entries into the item schema, dropping overlong
+    texts and (type, text) duplicates. `source` is anything with .get('id')/.get('name').
+    """
+    items = []
+    seen = set()
+    for source, t_type, text in entries:
+        if len(text) > MAX_TEXT_LENGTH:
+            continue
+        key_id = (t_type, text)
+        if key_id in seen:
+            continue
+        seen.add(key_id)
+        items.append({'type': t_type, 'text': text, 'key': make_key(source, text), 'context': context_of(source, text)})
+
+    return items
+
+
+# In-browser counterpart of extract_items: same ownership rules, but run on the
+# live DOM so invisible elements can be skipped and no HTML has to be serialized
+# and re-parsed in Python. Returns {owners: [{type, text, id, name, context}], links: [abs hrefs]}.
+BROWSER_EXTRACT_SCRIPT = """
+() => {
+  const SEMANTIC = %(semantic)s;
+  const CONTAINERS = new Set(%(containers)s);
+  const SKIP = new Set(%(skip)s);
+  const CONTEXT_LENGTH = %(context_length)d;
+
+  const hidden = (el) => {
+    if (el.hidden || el.getAttribute('aria-hidden') === 'true') return true;
+    if (el.checkVisibility) return !el.checkVisibility({visibilityProperty: true});
+    const style = getComputedStyle(el);
+    return style.display === 'none' || style.visibility === 'hidden';
+  };
+  const context = (el, text) => {
+    let attrs = '';
+    for (const attr of el.attributes) attrs += ` ${attr.name}="${attr.value}"`;
+    return `<${el.localName}${attrs}>${text}`.slice(0, CONTEXT_LENGTH);
+  };
+
+  const owners = [];
+  const stack = [[document.body || document.documentElement, null]];
+  while (stack.length) {
+    const [node, parentOwner] = stack.pop();
+    let owner = parentOwner;
+    if (node.nodeType === Node.TEXT_NODE) {
+      const text = node.nodeValue.trim();
+      if (owner && text) owner.parts.push(text);
+      continue;
+    }
+    if (node.nodeType !== Node.ELEMENT_NODE) continue;
+    const name = node.localName;
+    if (SKIP.has(name) || hidden(node)) continue;
+
+    if (!owner || !(owner.type in {button: 1, heading: 1, label: 1})) {
+      if (name in SEMANTIC) {
+        owner = {el: node, type: SEMANTIC[name], parts: []};
+        owners.push(owner);
+      } else if (CONTAINERS.has(name)) {
+        const type = String(node.className).includes('error') ? 'error_message' : 'text';
+        owner = {el: node, type, parts: []};
+        owners.push(owner);
+      }
+    }
+    const children = node.childNodes;
+    for (let i = children.length - 1; i >= 0; i--) stack.push([children[i], owner]);
+  }
+
+  const out = [];
+  for (const owner of owners) {
+    if (!owner.parts.length) continue;
+    const text = owner.parts.join(' ');
+    out.push({
+      type: owner.type,
+      text,
+      id: owner.el.id || null,
+      name: owner.el.getAttribute('name'),
+      context: context(owner.el, text),
+    });
+  }
+  const links = Array.from(document.querySelectorAll('a[href]'), (a) => a.href);
+  return {owners: out, links};
+}
+""" % {
+    'semantic': json.dumps(SEMANTIC_TYPES),
+    'containers': json.dumps(sorted(CONTAINER_TAGS)),
+    'skip': json.dumps(sorted(SKIP_TAGS)),
+    'context_length': CONTEXT_LENGTH,
+}
+
+
+def items_from_browser(result):
+    """Item list from the BROWSER_EXTRACT_SCRIPT result."""
+    return build_items(
+        ((owner, owner['type'], owner['text']) for owner in result['owners']),
+        lambda owner, text: owner['context'],
+    )
@@ -0,0 +1,114 @@
+from urllib.parse import urlparse
+import httpx
+from src.scheduler import THROTTLE_STATUSES, Throttled, parse_retry_after
+
+# Crawl profiles:
+#   full   - regular Chromium page load
+#   light  - Chromium, but images/fonts/media and tracker requests are aborted
+#   static - plain HTTP fetch, no browser (server-rendered sites)
+#   auto   - probe the start URL and pick static or light
+CRAWL_MODES = ('full', 'light', 'static', 'auto')
+
+# Nothing in these affects the text we read off the page. Stylesheets are kept
+# on purpose: the in-browser extractor relies on CSS to tell what is hidden.
+BLOCKED_RESOURCE_TYPES = {'image', 'media', 'font', 'texttrack', 'websocket', 'eventsource', 'manifest'}
+
+TRACKER_HOSTS = (
+    'google-analytics.com', 'googletagmanager.com', 'doubleclick.net', 'googlesyndication.com',
+    'facebook.net', 'connect.facebook.com', 'hotjar.com', 'segment.io', 'segment.com',
+    'mixpanel.com', 'amplitude.com', 'clarity.ms', 'fullstory.com', 'intercom.io',
+    'nr-data.net', 'newrelic.com', 'sentry.io', 'optimizely.com', 'hubspot.com', 'linkedin.com',
+    'tiktok.com', 'twitter.com', 'bing.com',
+)
+
+USER_AGENT = (
+    'Mozilla/5.0 (X11; Linux x86_64) AppleWebKit/537.36 (KHTML, like Gecko) '
+    'Chrome/120.0 Safari/537.36 LocalizationHealthChecker'
+)
+
+
+def site_domain(url):
+    """Host without a leading www., used to tell first-party from third-party requests."""
+    host = (urlparse(url).hostname or '').lower()
+    return host[4:] if host.startswith('www.') else host
+
+
+def _host_matches(host, domain):
+    return host == domain or host.endswith('.' + domain)
+
+
+def make_route_handler(start_url, block_third_party=False):
+    """
+    Playwright route handler for the 'light' profile. Documents always load, and
+    the site's own hosts are never treated as trackers (crawling linkedin.com or
+    hubspot.com must not abort the site itself).
+    """
+    domain = site_domain(start_url)
+
+    async def handle(route):
+        request = route.request
+        host = (urlparse(request.url).hostname or '').lower()
+        if request.resource_type == 'document':
+            await route.continue_()
+            return
+        third_party = not _host_matches(host, domain)
+        if (
+            request.resource_type in BLOCKED_RESOURCE_TYPES
+            or (third_party and (block_third_party or any(_host_matches(host, tracker) for tracker in TRACKER_HOSTS)))
+        ):
+            await route.abort()
+        else:
+            await route.continue_()
+
+    return handle
+
+
+class StaticFetcher:
+    """Pooled HTTP client for the 'static' profile. One connection pool shared by all workers."""
+
+    def __init__(self, concurrency=5, timeout=30.0):
+        self.concurrency = concurrency
+        self.timeout = timeout
+        self.client = None
+
+    async def __aenter__(self):
+        self.client = httpx.AsyncClient(
+            follow_redirects=True,
+            timeout=self.timeout,
+            headers={'User-Agent': USER_AGENT, 'Accept': 'text/html,application/xhtml+xml'},
+            limits=httpx.Limits(max_connections=self.concurrency * 2, max_keepalive_connections=self.concurrency),
+        )
+        return self
+
+    async def __aexit__(self, exc_type, exc, tb):
+        await self.client.aclose()
+
+    async def fetch(self, url):
+        """Returns (final_url, html) or raises on HTTP errors and non-HTML responses."""
+        final_url, html, _ = await self.fetch_conditional(url)
+        return final_url, html
+
+    async def fetch_conditional(self, url, validators=None):
+        """
+        GET with optional If-None-Match / If-Modified-Since headers. Returns
+        (final_url, html, (etag, last_modified)); html is None on 304 Not Modified.
+        Raises Throttled on 429/503 so the scheduler can back off and retry.
+        """
+        response = await self.client.get(url, headers=validators or None)
+        if response.status_code == 304:
+            return str(response.url), None, (None, None)
+        if response.status_code in THROTTLE_STATUSES:
+            raise Throttled(parse_retry_after(response.headers.get('retry-after')))
+        response.raise_for_status()
+        content_type = response.headers.get('content-type', '')
+        if 'html' not in content_type:
+            raise ValueError(f"Not an HTML page ({content_type or 'no content-type'})")
+        return str(response.url), response.text, (response.headers.get('etag'), response.headers.get('last-modified'))
+
+    async def check_modified(self, url, validators):
+        """Cheap conditional HEAD before a browser render. False only on 304 Not Modified."""
+        try:
+            response = await self.client.head(url, headers=validators)
+        except httpx.HTTPError:
+            return True
+        return response.status_code != 304
@@ -0,0 +1,129 @@
+import asyncio
+import heapq
+from collections import deque
+from fnmatch import fnmatch
+from urllib.parse import urlsplit, urlunsplit, parse_qsl, urlencode
+
+# Query params that never change what a page renders, only how it was reached.
+TRACKING_PARAMS = {
+    'gclid', 'fbclid', 'msclkid', 'dclid', 'yclid', 'mc_cid', 'mc_eid',
+    '_ga', '_gl', 'ref', 'ref_src', 'igshid',
+}
+TRACKING_PREFIXES = ('utm_', 'pk_', 'hsa_')
+
+DEFAULT_PORTS = {'http': 80, 'https': 443}
+
+
+def normalize_url(url):
+    """
+    Canonical form of a URL for dedup: lowercased scheme/host, no default port,
+    no fragment, no trailing slash, tracking params dropped and the rest sorted.
+    """
+    parts = urlsplit(url.strip())
+    scheme = parts.scheme.lower()
+    host = (parts.hostname or '').lower()
+    if parts.port and parts.port != DEFAULT_PORTS.get(scheme):
+        host = f"{host}:{parts.port}"
+
+    path = parts.path or '/'
+    if len(path) > 1:
+        path = path.rstrip('/') or '/'
+
+    query = [
+        (k, v) for k, v in parse_qsl(parts.query, keep_blank_values=True)
+        if k.lower() not in TRACKING_PARAMS and not k.lower().startswith(TRACKING_PREFIXES)
+    ]
+    query.sort()
+
+    return urlunsplit((scheme, host, path, urlencode(query), ''))
+
+
+def url_matches(url, pattern):
+    """Glob match against the full URL or just its path ('*/pricing*', '/docs/*')."""
+    return fnmatch(url, pattern) or fnmatch(urlsplit(url).path, pattern)
+
+
+class PriorityBuckets:
+    """FIFO deques keyed by priority; a small heap tracks which priorities are non-empty."""
+
+    def __init__(self):
+        self._buckets = {}
+        self._priorities = []
+        self._size = 0
+
+    def __len__(self):
+        return self._size
+
+    def __iter__(self):
+        for priority in sorted(self._buckets):
+            yield from self._buckets[priority]
+
+    def push(self, priority, item):
+        bucket = self._buckets.get(priority)
+        if bucket is None:
+            bucket = self._buckets[priority] = deque()
+            heapq.heappush(self._priorities, priority)
+        bucket.append(item)
+        self._size += 1
+
+    def pop(self):
+        priority = self._priorities[0]
+        bucket = self._buckets[priority]
+        item = bucket.popleft()
+        if not bucket:
+            heapq.heappop(self._priorities)
+            del self._buckets[priority]
+        self._size -= 1
+        return item
+
+
+class Frontier(asyncio.Queue):
+    """
+    Crawl frontier: FIFO deques bucketed by priority plus a hash index of every
+    URL ever scheduled. add/get are O(1) (the heap only holds the handful of
+    distinct priority values), so upkeep stays flat with 100k+ discovered links.
+
+    Priority (lower runs first) comes from the index of the first matching glob
+    in `priority_patterns`, then optionally from link depth (`by_depth`).
+    Workers use it like an asyncio.Queue: get(), task_done(), join().
+    """
+
+    def __init__(self, priority_patterns=None, by_depth=False):
+        self.priority_patterns = list(priority_patterns or [])
+        self.by_depth = by_depth
+        self.seen = set()
+        super().__init__()
+
+    def add(self, url, depth=0):
+        """Schedules a URL unless its canonical form was already seen. Returns the outcome."""
+        url = normalize_url(url)
+        if url in self.seen:
+            return False
+        self.seen.add(url)
+        self.put_nowait((url, depth))
+        return True
+
+    def add_many(self, urls, depth=0):
+        return sum(1 for url in urls if self.add(url, depth))
+
+    def __contains__(self, url):
+        return normalize_url(url) in self.seen
+
+    def _priority(self, url, depth):
+        rank = len(self.priority_patterns)
+        for i, pattern in enumerate(self.priority_patterns):
+            if url_matches(url, pattern):
+                rank = i
+                break
+        return (rank, depth if self.by_depth else 0)
+
+    # asyncio.Queue storage hooks (same approach as asyncio.PriorityQueue)
+
+    def _init(self, maxsize):
+        self._queue = PriorityBuckets()
+
+    def _put(self, item):
+        self._queue.push(self._priority(*item), item)
+
+    def _get(self):
+        return self._queue.pop()
@@ -0,0 +1,183 @@
+from apify import Actor
+import asyncio
+import json
+import os
+import re
+import tempfile
+import httpx
+from src import placeholders
+
+try:
+    import ijson
+except ImportError:
+    ijson = None
+
+# Source-language strings that are fine to leave untranslated: numbers, symbols, single letters
+NOT_TRANSLATABLE = re.compile(r'^[\W\d_]*\w?[\W\d_]*$')
+# Target values language-checked per detect_many batch
+DETECT_CHUNK = 5000
+
+
+def _flatten_events(events):
+    """Yields (dotted.key.path, value) for every string leaf of an ijson basic_parse event stream."""
+    path = []
+    stack = []  # None for an object, next index for an array
+    for event, value in events:
+        if event == 'map_key':
+            path[-1] = value
+            continue
+        if event in ('end_map', 'end_array'):
+            stack.pop()
+            path.pop()
+            continue
+        if stack and stack[-1] is not None:
+            path[-1] = str(stack[-1])
+            stack[-1] += 1
+        if event in ('start_map', 'start_array'):
+            stack.append(None if event == 'start_map' else 0)
+            path.append(None)
+        elif event == 'string':
+            yield '.'.join(path), value
+
+
+def _flatten_object(node, prefix=''):
+    if isinstance(node, dict):
+        items = node.items()
+    elif isinstance(node, list):
+        items = ((str(i), value) for i, value in enumerate(node))
+    else:
+        if isinstance(node, str):
+            yield prefix, node
+        return
+    for key, value in items:
+        yield from _flatten_object(value, f"{prefix}.{key}" if prefix else key)
+
+
+def flatten_json_file(path):
+    """{key.path: string} for a (possibly nested, possibly huge) locale file, parsed as a stream when ijson is installed."""
+    with open(path, 'rb') as f:
+        if ijson is not None:
+            return dict(_flatten_events(ijson.basic_parse(f)))
+        return dict(_flatten_object(json.load(f)))
+
+
+async def load_locale_file(client, source):
+    """Downloads (streamed to a temp file) or opens a locale file and flattens it."""
+    if not source.startswith(('http://', 'https://')):
+        return flatten_json_file(source)
+
+    fd, path = tempfile.mkstemp(suffix='.json')
+    try:
+        with os.fdopen(fd, 'wb') as f:
+            async with client.stream('GET', source) as response:
+                response.raise_for_status()
+                async for chunk in response.aiter_bytes():
+                    f.write(chunk)
+        return flatten_json_file(path)
+    finally:
+        os.remove(path)
+
+
+def locale_file_sources(url, languages, base_language, json_urls=None):
+    """{lang: source} for the base and target files: an explicit map, or a {lang} pattern in `url`."""
+    wanted = [base_language, *(lang for lang in languages if lang != base_language)]
+    if json_urls:
+        sources = {lang: json_urls[lang] for lang in wanted if lang in json_urls}
+        if base_language not in sources and url:
+            sources[base_language] = url
+    elif url and '{lang}' in url:
+        sources = {lang: url.replace('{lang}', lang) for lang in wanted}
+    else:
+        raise ValueError("For sourceType 'json' give jsonLocaleUrls or a url with a {lang} placeholder")
+    if base_language not in sources:
+        raise ValueError(f"No locale file given for the base language '{base_language}'")
+    return sources
+
+
+def diff_locales(base, target, lang, source, same_is_fine=None):
+    """
+    Key-level diff of a target locale against the base, done with set algebra over
+    the flattened key sets: missing keys, values identical to the base, and
+    placeholder sets that differ. `same_is_fine(text)` tells identical values that
+    need no translation (allowlisted terms, brands, loanwords). Returns issues in
+    the crawler's issue shape.
+    """
+    base_keys = base.keys()
+    target_keys = target.keys()
+    issues = []
+
+    for key in sorted(base_keys - target_keys):
+        issues.append(_issue('missing_key', base[key], key, 'high', lang, source, f'Missing in {lang}'))
+
+    for key in sorted(base_keys & target_keys):
+        base_text = base[key]
+        text = target[key]
+        if text == base_text:
+            if not NOT_TRANSLATABLE.match(base_text) and not (same_is_fine and same_is_fine(base_text)):
+                issues.append(_issue('untranslated', base_text, key, 'medium', lang, source, 'Same as base locale'))
+            continue
+        diff = placeholders.compare(base_text, text)
+        if diff:
+            issue = _issue('placeholder_mismatch', text, key, 'high', lang, source, placeholders.describe(diff))
+            issue['missing_tokens'] = diff['missing']
+            issue['extra_tokens'] = diff['extra']
+            issues.append(issue)
+
+    return issues
+
+
+def _issue(t_type, text, key, severity, lang, source, details):
+    return {
+        'type': t_type,
+        'text': text,
+        'key': key,
+        'severity': severity,
+        'context': key,
+        'details': details,
+        'language': lang,
+        'url': source,
+        'urls': [source],
+    }
+
+
+async def analyze_locale_files(analyzer, sources, base_language, analysis_pool=None):
+    """
+    Checks every target locale file against the base one: key diff plus the
+    Analyzer's per-string checks (fallback/mixed language, broken placeholders)
+    on the values that were actually translated. Returns the list of issues.
+    """
+    async with httpx.AsyncClient(follow_redirects=True, timeout=60.0) as client:
+        langs = list(sources)
+        loaded = await asyncio.gather(*(load_locale_file(client, sources[lang]) for lang in langs))
+    files = dict(zip(langs, loaded))
+    base = files.pop(base_language)
+    Actor.log.info(f"Loaded base locale '{base_language}' with {len(base)} keys")
+
+    all_issues = []
+    for lang, target in files.items():
+        source = sources[lang]
+        verifier = analyzer.short_strings
+        issues = diff_locales(
+            base, target, lang, source,
+            lambda text: verifier.allowed(text) or verifier.same_in(text, lang),
+        )
+
+        # Language checks only on values that differ from the base; identical ones are already reported
+        translated = [(key, text) for key, text in target.items() if base.get(key) != text]
+        # Detect in chunks that fit the detector's cache, so check_item only sees hits
+        for start in range(0, len(translated), DETECT_CHUNK):
+            chunk = translated[start:start + DETECT_CHUNK]
+            if analysis_pool is not None:
+                keys = analyzer.detector.missing(text for _, text in chunk)
+                analyzer.detector.remember_many(keys, await analysis_pool.detect(keys))
+            analyzer.detector.detect_many({text for _, text in chunk})
+            for key, text in chunk:
+                item = {'type': 'json_value', 'text': text, 'key': key, 'context': key}
+                for issue in analyzer.check_item(item, lang):
+                    issue.update({'language': lang, 'url': source, 'urls': [source]})
+                    issues.append(issue)
+
+        Actor.log.info(f"Checked '{lang}': {len(target)} keys, {len(issues)} issues")
+        all_issues.extend(issues)
+    return all_issues
+
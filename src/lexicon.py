@@ -0,0 +1,113 @@
+from bisect import bisect_left
+
+# Frequent UI and function words per language, for checking short strings
+# (buttons, nav, labels) where statistical detection is guesswork. Not a
+# dictionary: a word missing here just leaves the decision to the n-gram score.
+UI_WORDS = {
+    'en': """
+        a about account accept add address all already an and any apply are as at back basket be best blog
+        book browse buy by call cancel cart careers categories category change checkout choose city clear click
+        close collection community company confirm contact continue cookies copy country create customer
+        dashboard date day decline delete description details discover do done download edit email english
+        enter events explore faq featured features feedback file filter find first follow for forgot free from
+        full get gift go guide has have hello help here hide history home how if in inbox info information
+        is it items job jobs join just keep language last latest learn less let like list live load loading
+        log login logout manage me menu message messages more my name new news next no not notifications now
+        of off offer on one open or order orders other our out overview page password pay payment people
+        phone plan plans play please policy popular press preview previous price pricing privacy product
+        products profile quantity quick read recent register related remember remove request required reset
+        resources results return returns review reviews right sale save search see select sell send service
+        services settings share shipping shop show sign site size skip sort start started stay store submit
+        subscribe subtotal success support team terms that the this to today top total track try up update
+        upload us use user verify video view wait was we welcome what when where which who why will with
+        wishlist work year yes you your
+    """,
+    'es': """
+        a acceder aceptar acerca actualizar agregar ahora ajustes al anterior añadir aplicar artículo artículos ayuda
+        bienvenido bienvenida blog buscar búsqueda cambiar cancelar carrito categoría categorías cerrar
+        ciudad comentarios comprar compra con configuración confirmar contacto contraseña continuar correo crear cuenta
+        datos de del descargar descripción detalles devoluciones día dirección e editar el eliminar empresa
+        empezar en enviar envío es esta este estás explorar filtrar gracias guardar hoy idioma iniciar
+        inicio la las le leer lista lo los más mensaje mensajes menos mi mis nombre no nosotros noticias
+        nuevo nueva o oferta ofertas olvidaste opciones orden página pagar pago para pedido pedidos perfil
+        política popular populares por precio precios privacidad producto productos pregunta preguntas que quiénes recursos
+        registrarse registro reseñas responder resultados salir se seguir seleccionar servicio servicios
+        sesión si siguiente sobre soporte su sus tienda todo todos total términos tu tus un una usuario
+        ver ventas volver y ya
+    """,
+    'fr': """
+        à accepter accueil actualités adresse afficher ai aide ajouter annuler article articles assistance au aux avec
+        avis bienvenue blog boutique catégorie catégories ce ces changer chercher choisir commande commandes
+        commencer compte conditions confirmer confidentialité connecter connexion contact contactez continuer
+        créer d dans de des description détails du découvrir déconnexion e en encore enregistrer envoyer est
+        et fermer filtrer gratuit guide ici inscription inscrire je jour l la langue le les lire livraison
+        ma menu mes message messages mon mot nom nos notre nous nouveau nouvelle ou oublié page panier par
+        paramètres partager passe payer paiement plus politique populaire pour précédent prix produit produits profil
+        qui quantité rechercher recherche retour retours s se sélectionner services sous suivant supprimer
+        sur tarifs total tous tout un une utilisateur valider vérifier voir vos votre vous
+    """,
+    'de': """
+        abbrechen abmelden akzeptieren alle als am an anmelden anmeldung ansehen artikel auf aus auswählen
+        bearbeiten bei beliebt bestellen bestellung bestellungen bestätigen bewertungen blog das datenschutz
+        dein deine der details die du ein eine einkaufen einstellungen entdecken entfernen erstellen es für
+        gesamt hilfe hinzufügen ihr ihre im in ist jetzt kasse kategorie kategorien kaufen konto kontakt
+        kostenlos löschen mehr mein meine menü mit nach nachricht nachrichten name neu neue neuheiten nicht
+        oder passwort preis preise produkt produkte profil registrieren rücksendungen schließen senden
+        sie speichern sprache startseite suche suchen support teilen über unternehmen uns unsere und vergessen
+        versand von vor warenkorb weiter weniger willkommen zu zum zur zurück
+    """,
+    'it': """
+        a accedi accetta account aggiungi aiuto al alla annulla articoli articolo benvenuto blog cambia
+        carrello categoria categorie cerca chi chiudi ci con conferma contatti contattaci continua crea
+        da dei del della descrizione dettagli di e elimina esci gratis il in indietro iscriviti la le lingua
+        lo menu mio modifica negozio nome non notizie nuovo o offerte ordina ordine ordini pagamento pagina
+        password per più politica prezzi prezzo privacy prodotti prodotto profilo recensioni registrati
+        ricerca salva scopri seleziona servizi siamo spedizione successivo su supporto termini totale tuo
+        un una utente vai vedi
+    """,
+    'pt': """
+        a aceitar adicionar ajuda ao aos artigo artigos bem blog buscar cancelar carrinho categoria
+        categorias com comprar compra confirmar conta contato continuar criar da das de descrição detalhes
+        do dos e editar em empresa entrar enviar envio esqueceu excluir fechar finalizar frete grátis idioma
+        início inscrever la loja mais menos menu meu minha na no nome nossa nosso notícias novo nova o os
+        ou página pagamento para pedido pedidos perfil pesquisar política por preço preços privacidade
+        produto produtos próximo que sair salvar selecionar senha serviços sobre suporte termos total
+        um uma usuário ver vindo voltar você
+    """,
+    'nl': """
+        aan accepteren account afmelden alle annuleren artikel artikelen bekijken bestellen bestelling
+        bestellingen bevestigen bij blog categorie categorieën contact de details een en gratis het hulp in
+        inloggen instellingen is je jouw kopen laden maken meer menu met mijn naam nieuw nieuws niet of
+        om onze op opslaan over prijs prijzen privacy product producten profiel registreren uitloggen
+        van verder vergeten verwijderen verzenden verzending voor voorwaarden wachtwoord welkom
+        winkelwagen zoeken
+    """,
+}
+
+# Borrowed words that read the same in most Latin-script UIs ("Blog" on a Spanish page is fine)
+LOANWORDS = """
+    app apps blog chat cookies email e-mail faq feedback hashtag internet marketing newsletter ok
+    online podcast software streaming video web webinar wifi
+"""
+
+
+class Lexicon:
+    """A language's word list as one sorted tuple; lookups are a bisect, no per-word objects kept."""
+
+    def __init__(self, words):
+        self._words = tuple(sorted(set(words)))
+
+    def __len__(self):
+        return len(self._words)
+
+    def __contains__(self, word):
+        i = bisect_left(self._words, word)
+        return i < len(self._words) and self._words[i] == word
+
+
+def load_lexicon(lang):
+    """Lexicon for `lang` (UI words plus loanwords), or None when there is no list for it."""
+    words = UI_WORDS.get(lang)
+    if words is None:
+        return None
+    return Lexicon(words.split() + LOANWORDS.split())
@@ -1,72 +1,160 @@
 from lingodotdev import LingoDotDevEngine
 from apify import Actor
+from src.metrics import metrics
 import asyncio
+import random
+import time
+
+# Engine errors worth retrying: timeouts, 5xx, 429 and network failures.
+# The SDK raises them all as RuntimeError, told apart by message.
+TRANSIENT_MARKERS = ('Server error', '(429)', 'Request failed:')
+
+
+def _is_transient(error):
+    if isinstance(error, asyncio.TimeoutError):
+        return True
+    return isinstance(error, RuntimeError) and any(marker in str(error) for marker in TRANSIENT_MARKERS)
+
+
+def _is_rate_limited(error):
+    return '(429)' in str(error)
+
+
+class RateLimiter:
+    """Spaces request starts so no more than `rate` begin per second. rate=None disables it."""
+
+    def __init__(self, rate=None):
+        self.rate = rate
+        self._next_slot = 0.0
+        self._lock = asyncio.Lock()
+
+    async def wait(self):
+        if not self.rate:
+            return
+        async with self._lock:
+            now = time.monotonic()
+            delay = self._next_slot - now
+            self._next_slot = max(now, self._next_slot) + 1.0 / self.rate
+        if delay > 0:
+            await asyncio.sleep(delay)
+
+    def penalize(self, seconds):
+        """Pushes every future slot back, e.g. after a 429."""
+        self._next_slot = max(self._next_slot, time.monotonic() + seconds)
+
 
 class LingoClient:
-    def __init__(self, api_key, mock=False):
+    def __init__(self, api_key, mock=False, concurrency=5, max_retries=3, requests_per_second=None,
+                 timeout=15.0, engine_factory=None, cache=None):
         self.api_key = api_key
         self.mock = mock
+        self.concurrency = concurrency
+        self.max_retries = max_retries
+        self.timeout = timeout
+        # One long-lived engine (and HTTP connection pool) for the whole run.
+        # engine_factory lets benchmarks swap in a local stub.
+        self.engine_factory = engine_factory or (lambda: LingoDotDevEngine({"api_key": self.api_key}))
+        self._engine = None
+        # Optional persistent TranslationCache, consulted before any API call
+        self.cache = cache
+        self._engine_lock = asyncio.Lock()
+        self._semaphore = asyncio.Semaphore(concurrency)
+        self._rate_limiter = RateLimiter(requests_per_second)
+        # (text, target_lang) -> Task for translations currently in flight
+        self._inflight = {}
+        self.stats = {'requests': 0, 'coalesced': 0, 'retries': 0, 'failures': 0}
+
+    async def __aenter__(self):
+        return self
+
+    async def __aexit__(self, exc_type, exc, tb):
+        await self.close()
+
+    async def close(self):
+        if self._engine is not None:
+            await self._engine.__aexit__(None, None, None)
+            self._engine = None
+
+    async def _get_engine(self):
+        async with self._engine_lock:
+            if self._engine is None:
+                self._engine = await self.engine_factory().__aenter__()
+        return self._engine
 
     async def suggest_translation(self, text, target_lang, context=None):
         """
         Suggests a translation for the missing text using Lingo.dev.
+        Identical requests already in flight share one API call.
         """
         if self.mock:
             Actor.log.info(f"[MOCK] Requesting translation for '{text}' to {target_lang}")
             return f"[MOCK TRANSLATION to {target_lang}] {text}"
-            
-        try:
-            async with LingoDotDevEngine({"api_key": self.api_key}) as lingo:
-                # Assuming simple translate_text or similar method exists in SDK
-                # Adjusted to likely method name or standard usage. 
-                # If 'translate_text' doesn't exist, we might fail again.
-                # Let's hope the SDK follows the search result description even if class name differed.
-                # Add timeout to prevent hanging
-                 result = await asyncio.wait_for(
-                    lingo.quick_translate(
-                        text, 
-                        api_key=self.api_key,
-                        target_locale=target_lang
-                    ),
-                    timeout=15.0
-                 )
-                 return result
-        except Exception as e:
-            Actor.log.error(f"Lingo.dev API error: {e}")
-            return None
-
-    async def suggest_translation_batch(self, texts, target_lang, batch_size=5):
+
+        if self.cache is not None:
+            cached = self.cache.get(text, target_lang)
+            if cached is not None:
+                return cached
+            result = await self._suggest_uncached(text, target_lang)
+            if result:
+                self.cache.put(text, target_lang, result)
+            return result
+        return await self._suggest_uncached(text, target_lang)
+
+    async def _suggest_uncached(self, text, target_lang):
+        key = (text, target_lang)
+        task = self._inflight.get(key)
+        if task is not None:
+            self.stats['coalesced'] += 1
+        else:
+            task = asyncio.ensure_future(self._translate(text, target_lang))
+            self._inflight[key] = task
+            task.add_done_callback(lambda _: self._inflight.pop(key, None))
+        # shield: one caller being cancelled must not cancel the shared request
+        return await asyncio.shield(task)
+
+    async def _translate(self, text, target_lang):
+        """One translation with bounded concurrency, rate limiting and retries (exponential backoff + jitter)."""
+        for attempt in range(self.max_retries + 1):
+            try:
+                async with self._semaphore:
+                    await self._rate_limiter.wait()
+                    engine = await self._get_engine()
+                    self.stats['requests'] += 1
+                    with metrics.timer('translate'):
+                        return await asyncio.wait_for(
+                            engine.localize_text(text, {"target_locale": target_lang, "fast": True}),
+                            timeout=self.timeout
+                        )
+            except Exception as e:
+                if attempt == self.max_retries or not _is_transient(e):
+                    self.stats['failures'] += 1
+                    Actor.log.error(f"Lingo.dev API error: {e}")
+                    return None
+                backoff = min(30.0, 0.5 * 2 ** attempt) * random.uniform(0.5, 1.5)
+                if _is_rate_limited(e):
+                    self._rate_limiter.penalize(backoff)
+                self.stats['retries'] += 1
+                Actor.log.warning(f"Lingo.dev transient error ({e}), retry {attempt + 1} in {backoff:.1f}s")
+                await asyncio.sleep(backoff)
+
+    async def suggest_translation_batch(self, texts, target_lang, batch_size=None):
         """
-        Translates a list of texts in parallel (bounded).
+        Translates a list of texts concurrently, up to the client's concurrency limit.
+        `batch_size` is accepted for backwards compatibility; the limit is set on the client.
         """
         if not texts: return {}
         if self.mock:
             return {t: f"[MOCK to {target_lang}] {t}" for t in texts}
 
-        results = {}
-        semaphore = asyncio.Semaphore(batch_size)
-
-        async def _translate_one(text):
-            async with semaphore:
-                try:
-                    # Reuse the single translate logic with timeout
-                    # We create a new engine instance per call or reuse? 
-                    # The Context Manager usage in suggest_translation implies per-call.
-                    # We will reuse suggest_translation but bypass the self.mock check which is already done.
-                     return await self.suggest_translation(text, target_lang)
-                except Exception:
-                    return None
-
-        # Create tasks
-        tasks = [(_translate_one(text), text) for text in texts]
-        
-        # Execute
-        # We need to map result back to text
-        for coro, text in tasks:
-            res = await coro
-            if res:
-                results[text] = res
+        unique_texts = list(dict.fromkeys(texts))
+        results = self.cache.get_many(unique_texts, target_lang) if self.cache is not None else {}
+        pending = [text for text in unique_texts if text not in results]
         
+        translations = await asyncio.gather(
+            *(self._suggest_uncached(text, target_lang) for text in pending)
+        )
+        fresh = {text: res for text, res in zip(pending, translations) if res}
+        if self.cache is not None and fresh:
+            self.cache.put_many(fresh, target_lang)
+        results.update(fresh)
         return results
-
-
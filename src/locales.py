@@ -0,0 +1,81 @@
+from apify import Actor
+from urllib.parse import urljoin, urlsplit
+from src.extract import parse_html
+from src.fetch import StaticFetcher
+
+
+def primary_subtag(code):
+    """'es-ES' / 'pt_BR' -> 'es' / 'pt'."""
+    return code.replace('_', '-').split('-')[0].lower()
+
+
+def locale_urls_from_pattern(pattern, languages):
+    """'https://example.com/{lang}/' or 'https://{lang}.example.com/?lang={lang}' -> {lang: url}."""
+    return {lang: pattern.replace('{lang}', lang) for lang in languages}
+
+
+def _hreflang_rank(code, lang):
+    """How well an hreflang code fits a wanted code: 0 exact ('pt-BR'), 1 the bare language ('es'), 2 another region."""
+    code = code.replace('_', '-').lower()
+    if code == lang.replace('_', '-').lower():
+        return 0
+    return 1 if code == primary_subtag(code) else 2
+
+
+def hreflang_urls(html, page_url, languages):
+    """
+    {lang: url} from <link rel=alternate hreflang> and <a hreflang> tags, keyed by
+    the codes in `languages`. Codes match on their primary language ('es-ES'
+    finds hreflang 'es'); an exact code, then the bare language, is preferred.
+    """
+    wanted = {}
+    for lang in languages:
+        wanted.setdefault(primary_subtag(lang), []).append(lang)
+    found = {}
+    ranks = {}
+    soup = parse_html(html)
+    for tag in soup.find_all(['link', 'a'], hreflang=True, href=True):
+        code = tag['hreflang']
+        if code == 'x-default':
+            continue
+        for lang in wanted.get(primary_subtag(code), ()):
+            rank = _hreflang_rank(code, lang)
+            if rank < ranks.get(lang, 3):
+                ranks[lang] = rank
+                found[lang] = urljoin(page_url, tag['href'])
+    return found
+
+
+def locale_scope(url):
+    """
+    Path prefix that keeps a locale crawl inside its variant ('/es/' for
+    https://example.com/es/...). None when the locale lives on its own host or in
+    the query string; host scoping is already enforced by the crawler.
+    """
+    path = urlsplit(url).path
+    first = path.strip('/').split('/')[0]
+    return f"/{first}/" if first and 2 <= len(first) <= 7 and '.' not in first else None
+
+
+async def resolve_locale_urls(start_url, languages, base_language, locale_urls=None, pattern=None):
+    """
+    Start URL per target language, from (in order) the explicit `locale_urls`
+    mapping, a `{lang}` URL pattern, or hreflang alternates on the start page.
+    Returns {} when no locale variants are known.
+    """
+    targets = [lang for lang in languages if lang != base_language]
+    if locale_urls:
+        return {lang: locale_urls[lang] for lang in targets if lang in locale_urls}
+    if pattern:
+        return locale_urls_from_pattern(pattern, targets)
+
+    try:
+        async with StaticFetcher(concurrency=1) as fetcher:
+            final_url, html = await fetcher.fetch(start_url)
+    except Exception as e:
+        Actor.log.warning(f"Could not read hreflang alternates from {start_url}: {e}")
+        return {}
+    found = hreflang_urls(html, final_url, targets)
+    if found:
+        Actor.log.info(f"Discovered locale variants via hreflang: {found}")
+    return found
@@ -2,10 +2,53 @@ from apify import Actor
 import asyncio
 from src.crawler import Crawler
 from src.analyzer import Analyzer
+from src.browser_pool import DEFAULT_RECYCLE_AFTER, BrowserManager
+from src.analysis_pool import AnalysisPool, default_workers
+from src.detection import LanguageDetector, make_backend
+from src.json_source import analyze_locale_files, locale_file_sources
 from src.lingo import LingoClient
-import pandas as pd
+from src.metrics import METRICS_RECORD_KEY, metrics, profiling
+from src.locales import locale_scope, resolve_locale_urls
+from src.pipeline import Pipeline
+from src.reports import export_reports
+from src.scan_state import ScanState
+from src.scheduler import HostScheduler
+from src.short_strings import ShortStringVerifier
+from src.translation_cache import TranslationCache
+import hashlib
 import json
 
+def count_issues(issues, lang):
+    """Issue counts used for one language's score."""
+    counts = {"missing": 0, "fallbacks": 0, "mixedLanguage": 0, "brokenPlaceholders": 0}
+    for issue in issues:
+        if issue.language not in (None, lang):
+            continue
+        if issue.type == 'missing_key':
+            counts['missing'] += 1
+            continue
+        if issue.type in ('fallback_text', 'untranslated'): counts['fallbacks'] += 1
+        elif issue.type == 'mixed_language': counts['mixedLanguage'] += 1
+        elif issue.type in ('broken_placeholder', 'placeholder_mismatch'): counts['brokenPlaceholders'] += 1
+        if issue.suggestion(lang):
+            counts['missing'] += 1 # approximate
+    return counts
+
+
+async def crawl_locales(locale_urls, crawler_options, page_sink):
+    """Crawls every locale variant concurrently, sharing one browser. Pages go to page_sink(lang)."""
+    crawlers = {
+        lang: Crawler(start_url=locale_url, scope=locale_scope(locale_url), on_page=page_sink(lang), **crawler_options)
+        for lang, locale_url in locale_urls.items()
+    }
+    if crawler_options['crawl_mode'] == 'static':
+        await asyncio.gather(*(crawler.run() for crawler in crawlers.values()))
+    else:
+        # One Chromium for every locale, 'auto' probes included; launched only once a page needs it
+        async with BrowserManager() as browsers:
+            await asyncio.gather(*(crawler.run(browsers) for crawler in crawlers.values()))
+
+
 async def main():
     async with Actor:
         Actor.log.info('Actor starting...')
@@ -17,6 +60,36 @@ async def main():
         languages = actor_input.get('languages', ['es']) # Default to Spanish check if empty
         base_language = actor_input.get('baseLanguage', 'en')
         max_pages = actor_input.get('maxPages', 5)
+        max_concurrency = actor_input.get('maxConcurrency', 3)
+        max_concurrency_per_host = actor_input.get('maxConcurrencyPerHost') # None = maxConcurrency per locale crawl on a host
+        priority_patterns = actor_input.get('priorityPatterns', [])
+        shallow_first = actor_input.get('shallowFirst', False)
+        use_sitemaps = actor_input.get('useSitemaps', False)
+        respect_robots = actor_input.get('respectRobotsTxt', True)
+        include_patterns = actor_input.get('includePatterns', [])
+        exclude_patterns = actor_input.get('excludePatterns', [])
+        extraction_mode = actor_input.get('extractionMode', 'browser')
+        crawl_mode = actor_input.get('crawlMode', 'light')
+        block_third_party = actor_input.get('blockThirdParty', False)
+        recycle_context_after = actor_input.get('recycleContextAfter', DEFAULT_RECYCLE_AFTER) # navigations
+        browser_memory_limit_mb = actor_input.get('browserMemoryLimitMb') # Chromium RSS, None = no limit
+        detection_backend = actor_input.get('detectionBackend', 'langdetect')
+        translation_concurrency = actor_input.get('translationConcurrency', 5)
+        translation_rate_limit = actor_input.get('translationRateLimit') # requests/second, None = unlimited
+        use_translation_cache = actor_input.get('useTranslationCache', True)
+        translation_cache_store = actor_input.get('translationCacheStore', 'lingo-translation-cache')
+        translation_cache_path = actor_input.get('translationCachePath') # local SQLite file instead of the store
+        translation_cache_ttl_days = actor_input.get('translationCacheTtlDays', 30)
+        translation_cache_max_entries = actor_input.get('translationCacheMaxEntries', 200000)
+        locale_url_map = actor_input.get('localeUrls') # {lang: url}
+        locale_url_pattern = actor_input.get('localeUrlPattern') # e.g. https://example.com/{lang}/
+        discover_locales = actor_input.get('discoverLocales', True) # hreflang alternates on the start page
+        incremental_scan = actor_input.get('incrementalScan', False)
+        scan_state_store = actor_input.get('scanStateStore', 'incremental-scan-state')
+        analysis_workers = actor_input.get('analysisWorkers') # None = one per spare core, 0 = analyze on the event loop
+        profile_mode = actor_input.get('profile') # 'cprofile' / 'py-spy'
+        allowed_terms = actor_input.get('allowedTerms', []) # brand / technical terms never flagged
+        json_locale_urls = actor_input.get('jsonLocaleUrls') # {lang: locale file URL or path} for sourceType 'json'
         lingo_api_key = actor_input.get('lingoApiKey') # User provided key
         
         # MOCK MODE SAFETY: Default to MOCK if no key or for testing
@@ -26,75 +99,114 @@ async def main():
              is_mock = True
         
         # Initialize Components
-        crawler = Crawler(start_url=url, max_pages=max_pages)
-        analyzer = Analyzer(target_languages=languages, base_language=base_language)
-        lingo_client = LingoClient(api_key=lingo_api_key, mock=is_mock)
-        
-        # 1. Crawl
-        Actor.log.info(f"Crawling {url}...")
-        crawled_data = await crawler.run()
-        Actor.log.info(f"Crawled {len(crawled_data)} pages.")
+        # One per-host scheduler for the whole run: locale crawls on the same host share its window,
+        # which holds maxConcurrency per locale crawl unless maxConcurrencyPerHost caps it
+        scheduler = HostScheduler(max_concurrency, per_host_limit=max_concurrency_per_host)
+        crawler_options = {
+            'max_pages': max_pages,
+            'concurrency': max_concurrency,
+            'priority_patterns': priority_patterns,
+            'by_depth': shallow_first,
+            'extraction_mode': extraction_mode,
+            'crawl_mode': crawl_mode,
+            'block_third_party': block_third_party,
+            'recycle_after': recycle_context_after,
+            'browser_memory_limit_mb': browser_memory_limit_mb,
+            'scheduler': scheduler,
+            'use_sitemaps': use_sitemaps,
+            'respect_robots': respect_robots,
+            'include_patterns': include_patterns,
+            'exclude_patterns': exclude_patterns,
+        }
+        scan_state = None
+        if incremental_scan and source_type != 'json':
+            # Pages unchanged since the last run (304 or same items) are replayed with their stored verdicts
+            terms = hashlib.sha1('\n'.join(sorted(allowed_terms)).encode('utf-8')).hexdigest()[:8]
+            fingerprint = f"{detection_backend}|{base_language}|{','.join(sorted(languages))}|short-strings:{terms}"
+            scan_state = await ScanState.open_from_store(scan_state_store, url, fingerprint)
+            crawler_options['scan_state'] = scan_state
+        detector = LanguageDetector(backend=make_backend(detection_backend, languages=[base_language, *languages]))
+        short_strings = ShortStringVerifier(base_language, allowlist=allowed_terms)
+        analyzer = Analyzer(target_languages=languages, base_language=base_language, detector=detector,
+                            scan_state=scan_state, short_strings=short_strings)
+        translation_cache = None
+        if use_translation_cache and not is_mock:
+            cache_options = {
+                'ttl_seconds': translation_cache_ttl_days * 86400,
+                'max_entries': translation_cache_max_entries,
+            }
+            if translation_cache_path:
+                translation_cache = TranslationCache(translation_cache_path, **cache_options)
+            else:
+                translation_cache = await TranslationCache.open_from_store(translation_cache_store, **cache_options)
+        lingo_client = LingoClient(
+            api_key=lingo_api_key,
+            mock=is_mock,
+            concurrency=translation_concurrency,
+            requests_per_second=translation_rate_limit,
+            cache=translation_cache,
+        )
+        target_languages = [lang for lang in languages if lang != base_language]
+
+        # Locale variants: {lang: start URL}. When none are known, the single `url`
+        # is checked against every target language.
+        locale_urls = {}
+        if source_type != 'json' and (locale_url_map or locale_url_pattern or discover_locales):
+            locale_urls = await resolve_locale_urls(url, languages, base_language, locale_url_map, locale_url_pattern)
+        unresolved = [lang for lang in target_languages if locale_urls and lang not in locale_urls]
+        if unresolved:
+            # Their pages are never crawled, so a score for them would be a made-up 100
+            Actor.log.warning(f"No locale variant found for {unresolved}: they are not checked or scored")
+            target_languages = [lang for lang in target_languages if lang in locale_urls]
         
-        # 2. Analyze & Score
-        all_issues = []
-        localization_scores = {lang: 100 for lang in languages} # Start at 100
+        if analysis_workers is None:
+            analysis_workers = default_workers()
+        analysis_pool = None
+        if analysis_workers > 0:
+            analysis_pool = AnalysisPool(detection_backend, [base_language, *languages], analysis_workers)
+        pipeline = Pipeline(analyzer, lingo_client, target_languages, is_mock, analysis_pool=analysis_pool)
+        # Optional profiler around the crawl/analyze/translate work
+        async with profiling(profile_mode):
+            if source_type == 'json':
+                # Locale bundles: key diff against the base file plus per-string checks, no browser
+                sources = locale_file_sources(url, languages, base_language, json_locale_urls)
+                Actor.log.info(f"Checking locale files: {sources}")
+                issues = await analyze_locale_files(analyzer, sources, base_language, analysis_pool)
+                all_issues = await pipeline.run_issues(issues)
+            else:
+                # 1-3. Crawl -> Analyze -> Translate, streamed page by page.
+                # Shared template text (nav, footer, buttons) is analyzed once per site,
+                # so every issue is a unique string with an occurrence count. A locale
+                # crawl is checked against its own expected language. New issues are
+                # pushed to the dataset as soon as their suggestions are ready.
+                if locale_urls:
+                    Actor.log.info(f"Crawling {len(locale_urls)} locale variants: {locale_urls}")
+                    crawls = [crawl_locales(locale_urls, crawler_options, pipeline.page_sink)]
+                else:
+                    Actor.log.info(f"Crawling {url}...")
+                    crawls = [Crawler(start_url=url, on_page=pipeline.page_sink(None), **crawler_options).run()]
+                all_issues = await pipeline.run(crawls)
         
-        # Global stats for scoring
-        total_missing = 0
-        total_fallback = 0
-        total_mixed = 0
-        total_broken = 0
-
-        for i, page in enumerate(crawled_data):
-            Actor.log.info(f"Analyzing page {i+1}/{len(crawled_data)}: {page['url']}")
-            analysis = analyzer.analyze_page(page)
-            # 1. Collect texts needing suggestions
-            texts_to_translate = set()
-            for issue in analysis['issues']:
-                if issue['type'] in ['fallback_text', 'mixed_language']:
-                    texts_to_translate.add(issue['text'])
-            
-            # 2. Batch Translate (for each target language)
-            # We assume non-base languages are targets
-            translations_map = {} # { lang: { text: translation } }
-             
-            if texts_to_translate and not is_mock:
-                 Actor.log.info(f"  > Batch translating {len(texts_to_translate)} unique items...")
-                 
-                 for lang in languages:
-                    if lang == base_language: continue
-                    # Call batch method
-                    translations_map[lang] = await lingo_client.suggest_translation_batch(list(texts_to_translate), lang)
+        if analysis_pool is not None:
+            analysis_pool.close()
+        if scheduler.hosts:
+            Actor.log.info(f"  > Host scheduler: {scheduler.stats()}")
+            scheduler.log_summary()
+        if scan_state is not None:
+            Actor.log.info(f"  > Incremental scan: {scan_state.stats()}")
+            await scan_state.persist()
+        if not is_mock:
+            Actor.log.info(f"  > Lingo.dev client: {lingo_client.stats}")
+        await lingo_client.close()
+        if translation_cache is not None:
+            Actor.log.info(f"  > Translation cache: {translation_cache.stats()}")
+            metrics.add_counters('translation_cache', translation_cache.stats())
+            await translation_cache.persist()
+            translation_cache.close()
 
-            # 3. Apply results to issues
-            for j, issue in enumerate(analysis['issues']):
-                issue['url'] = page['url']
-                
-                # Apply suggestions if available
-                if issue['type'] in ['fallback_text', 'mixed_language']:
-                     for lang in languages:
-                        if lang == base_language: continue
-                        
-                        # Get from batch result or fallback to None
-                        # If MOCK, we didn't populate the map properly above in this snippet logic
-                        # But lingo_client handles mock in batch too.
-                        
-                        translation = None
-                        if is_mock:
-                             translation = f"[MOCK] {issue['text']}"
-                        elif lang in translations_map and issue['text'] in translations_map[lang]:
-                             translation = translations_map[lang][issue['text']]
-                        
-                        if translation:
-                            issue[f'suggestion_{lang}'] = translation
-                
-                all_issues.append(issue)
-                
-                if issue['type'] == 'fallback_text': total_fallback += 1
-                elif issue['type'] == 'mixed_language': total_mixed += 1
-                elif issue['type'] == 'broken_placeholder': total_broken += 1
-                if issue.get(f'suggestion_{languages[0] if languages[0]!=base_language else "es"}'):
-                    total_missing += 1
+        if source_type != 'json' and not pipeline.pages_analyzed:
+            # Nothing was checked, so every language would score a perfect 100
+            raise RuntimeError(f"No page of {url} could be crawled, refusing to score")
 
         # 3. Calculate Final Scores
         # Score = 100 - 2*missing - 1*fallback - 3*mixed - 5*broken
@@ -102,89 +214,37 @@ async def main():
         # The prompt asked for "Localization Score { language: hi, score: 62 }"
         
         final_scores = []
-        for lang in languages:
-            if lang == base_language: continue
+        for lang in target_languages:
+            counts = count_issues(all_issues, lang)
             
             # Simple formula application
             # Note: This simple formula might go below 0, so clamp it.
-            score = 100 - (2 * total_missing) - (1 * total_fallback) - (3 * total_mixed) - (5 * total_broken)
+            score = 100 - (2 * counts['missing']) - (1 * counts['fallbacks']) - (3 * counts['mixedLanguage']) - (5 * counts['brokenPlaceholders'])
             score = max(0, score)
             
             final_scores.append({
                 "language": lang,
                 "score": score,
-                "issues": {
-                    "missing": total_missing, # approximate
-                    "fallbacks": total_fallback,
-                    "mixedLanguage": total_mixed,
-                    "brokenPlaceholders": total_broken
-                }
+                "issues": counts
             })
 
         # 4. Export
         # Save to Key-Value Store (visible in Apify Console)
-        await Actor.push_data(final_scores) # The primary output
+        await Actor.push_data([{**score, 'recordType': 'score'} for score in final_scores]) # The primary output
         
-        # Detailed Report
-        await Actor.set_value('DETAILED_REPORT', all_issues)
-        
-        # Generate i18n JSONs (GitHub-ready)
-        # Structure: { lang: { key: translation } }
-        i18n_export = {}
-        for issue in all_issues:
-            # We use the key from crawler if available, or text slug
-            key = issue.get('key')
-            if not key:
-                 # Should have been set by analyzer passing through from crawler items
-                 # But analyzer just passed 'issues'. Rethink data flow if needed.
-                 # Ah, analyzer receives 'page_data' which has 'items' which has 'key'.
-                 # But 'issues' are created new. We need to pass 'key' from item to issue in analyzer.
-                 key = issue.get('text', '')[:20].strip().replace(' ', '_').lower()
-            
-            for lang in languages:
-                if lang == base_language: continue
-                suggestion_key = f'suggestion_{lang}'
-                if suggestion_key in issue and issue[suggestion_key]:
-                    if lang not in i18n_export: i18n_export[lang] = {}
-                    i18n_export[lang][key] = issue[suggestion_key]
-        
-        # Save i18n JSONs
-        for lang, translations in i18n_export.items():
-            await Actor.set_value(f'i18n_{lang}.json', translations)
-            Actor.log.info(f"Exported i18n_{lang}.json with {len(translations)} keys.")
+        # Detailed Report, i18n JSONs and CSV, streamed from the compact issue records
+        await export_reports(all_issues, target_languages)
 
-        # Create CSV
         if all_issues:
-            # Flatten for CSV
-            csv_data = []
-            for i in all_issues:
-                row = {
-                    'url': i.get('url'),
-                    'type': i.get('type'),
-                    'severity': i.get('severity'),
-                    'text_found': i.get('text'),
-                    'context': i.get('context'),
-                    'detected_lang': i.get('details', '')
-                }
-                for lang in languages:
-                    if lang == base_language: continue
-                    row[f'suggestion_{lang}'] = i.get(f'suggestion_{lang}', '')
-                csv_data.append(row)
-                
-
-
-            df = pd.DataFrame(csv_data)
-            await Actor.set_value('localization_issues.csv', df.to_csv(index=False), content_type='text/csv')
-            
             # Log examples of issues for user visibility
             Actor.log.info("--- ISSUE HIGHLIGHTS ---")
             
-            fallbacks = [i['text'] for i in all_issues if i['type'] == 'fallback_text'][:5]
+            fallbacks = [i.text for i in all_issues if i.type == 'fallback_text'][:5]
             if fallbacks:
                 Actor.log.info(f"Top 5 Fallback Text examples (English on target page):")
                 for text in fallbacks: Actor.log.info(f"  - \"{text[:50]}...\"")
 
-            mixed = [i['text'] for i in all_issues if i['type'] == 'mixed_language'][:5]
+            mixed = [i.text for i in all_issues if i.type == 'mixed_language'][:5]
             if mixed:
                 Actor.log.info(f"Top 5 Mixed Language examples (confirmed by Lingo):")
                 for text in mixed: Actor.log.info(f"  - \"{text[:50]}...\"")
@@ -195,6 +255,19 @@ async def main():
         await Actor.charge('localization-check')
         Actor.log.info("Charged for event: localization-check")
 
+        Actor.log.info(f"Language detection: {detector.stats()}")
+        Actor.log.info(f"Short string verdicts: {short_strings.stats}")
+
+        # Run metrics: per-stage latency histograms plus component counters
+        metrics.add_counters('detection', detector.stats())
+        metrics.add_counters('short_strings', short_strings.stats)
+        metrics.add_counters('lingo', lingo_client.stats)
+        metrics.add_counters('scheduler', scheduler.stats())
+        if scan_state is not None:
+            metrics.add_counters('incremental', scan_state.stats())
+        await Actor.set_value(METRICS_RECORD_KEY, metrics.snapshot())
+        Actor.log.info("Stage timings:")
+        metrics.log_summary()
         Actor.log.info("Analysis Complete.")
         Actor.log.info(f"Scores: {final_scores}")
 
@@ -0,0 +1,172 @@
+from apify import Actor
+import cProfile
+import io
+import os
+import pstats
+import random
+import shutil
+import signal
+import subprocess
+import tempfile
+import time
+from contextlib import asynccontextmanager, contextmanager
+
+METRICS_RECORD_KEY = 'RUN_METRICS'
+PROFILE_MODES = ('cprofile', 'py-spy')
+
+
+class Histogram:
+    """
+    Latency samples for one stage. Count, total and max are exact; percentiles
+    come from a uniform reservoir of at most `max_samples` samples.
+    """
+
+    def __init__(self, max_samples=10000):
+        self.max_samples = max_samples
+        self.count = 0
+        self.total = 0.0
+        self.max = 0.0
+        self._samples = []
+        self._rng = random.Random(0)
+
+    def observe(self, seconds):
+        self.count += 1
+        self.total += seconds
+        self.max = max(self.max, seconds)
+        if len(self._samples) < self.max_samples:
+            self._samples.append(seconds)
+        else:
+            slot = self._rng.randrange(self.count)
+            if slot < self.max_samples:
+                self._samples[slot] = seconds
+
+    def percentile(self, p):
+        if not self._samples:
+            return 0.0
+        ordered = sorted(self._samples)
+        return ordered[min(len(ordered) - 1, int(p / 100 * len(ordered)))]
+
+    def summary(self):
+        ms = 1000
+        return {
+            'count': self.count,
+            'total_s': round(self.total, 3),
+            'mean_ms': round(self.total / self.count * ms, 2) if self.count else 0.0,
+            'p50_ms': round(self.percentile(50) * ms, 2),
+            'p95_ms': round(self.percentile(95) * ms, 2),
+            'max_ms': round(self.max * ms, 2),
+        }
+
+
+class Metrics:
+    """
+    Run-wide timers and counters. Stages are timed with `timer(name)` (works
+    around awaits too, it measures wall time), events with `count(name)`.
+    """
+
+    def __init__(self):
+        self.started = time.monotonic()
+        self.stages = {}
+        self.counters = {}
+
+    @contextmanager
+    def timer(self, stage):
+        started = time.perf_counter()
+        try:
+            yield
+        finally:
+            self.observe(stage, time.perf_counter() - started)
+
+    def observe(self, stage, seconds):
+        histogram = self.stages.get(stage)
+        if histogram is None:
+            histogram = self.stages[stage] = Histogram()
+        histogram.observe(seconds)
+
+    def count(self, name, n=1):
+        self.counters[name] = self.counters.get(name, 0) + n
+
+    def add_counters(self, prefix, values):
+        """Copies a component's numeric stats (e.g. LingoClient.stats) in as `prefix.name` counters."""
+        for name, value in values.items():
+            if isinstance(value, (int, float)) and not isinstance(value, bool):
+                self.counters[f"{prefix}.{name}"] = value
+
+    def snapshot(self):
+        return {
+            'wall_seconds': round(time.monotonic() - self.started, 3),
+            'stages': {stage: histogram.summary() for stage, histogram in sorted(self.stages.items())},
+            'counters': dict(sorted(self.counters.items())),
+        }
+
+    def log_summary(self):
+        for stage, summary in self.snapshot()['stages'].items():
+            Actor.log.info(
+                f"  > {stage}: {summary['count']}x, p50 {summary['p50_ms']} ms, "
+                f"p95 {summary['p95_ms']} ms, total {summary['total_s']} s"
+            )
+
+
+# Shared by every component of the run
+metrics = Metrics()
+
+
+@asynccontextmanager
+async def profiling(mode=None):
+    """
+    Optional profiler around the whole run.
+      cprofile - in-process cProfile; PROFILE.prof (pstats / snakeviz) and
+                 PROFILE.txt (top functions) go to the key-value store
+      py-spy   - attaches `py-spy record` to this process (needs py-spy on PATH
+                 and ptrace rights) and stores the flame graph as PROFILE.svg
+    """
+    if mode not in PROFILE_MODES:
+        yield
+        return
+
+    if mode == 'cprofile':
+        profiler = cProfile.Profile()
+        profiler.enable()
+        try:
+            yield
+        finally:
+            profiler.disable()
+            await _store_cprofile(profiler)
+        return
+
+    py_spy = shutil.which('py-spy')
+    if py_spy is None:
+        Actor.log.warning("profile 'py-spy' requested but py-spy is not installed, running unprofiled")
+        yield
+        return
+    fd, path = tempfile.mkstemp(suffix='.svg')
+    os.close(fd)
+    process = subprocess.Popen(
+        [py_spy, 'record', '--pid', str(os.getpid()), '--output', path, '--format', 'flamegraph'],
+        stdout=subprocess.DEVNULL, stderr=subprocess.DEVNULL,
+    )
+    Actor.log.info(f"py-spy recording pid {os.getpid()}")
+    try:
+        yield
+    finally:
+        # py-spy writes its output when interrupted
+        process.send_signal(signal.SIGINT)
+        process.wait(timeout=30)
+        with open(path, 'rb') as f:
+            svg = f.read()
+        os.remove(path)
+        if svg:
+            await Actor.set_value('PROFILE.svg', svg, content_type='image/svg+xml')
+
+
+async def _store_cprofile(profiler):
+    fd, path = tempfile.mkstemp(suffix='.prof')
+    os.close(fd)
+    profiler.dump_stats(path)
+    with open(path, 'rb') as f:
+        await Actor.set_value('PROFILE.prof', f.read(), content_type='application/octet-stream')
+    os.remove(path)
+
+    text = io.StringIO()
+    pstats.Stats(profiler, stream=text).sort_stats('cumulative').print_stats(40)
+    await Actor.set_value('PROFILE.txt', text.getvalue(), content_type='text/plain')
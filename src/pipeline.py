@@ -0,0 +1,183 @@
+from apify import Actor
+import asyncio
+from src.metrics import metrics
+from src.records import IssueRecord
+from src.string_index import SiteStringIndex
+
+TRANSLATABLE_TYPES = ('fallback_text', 'mixed_language', 'missing_key', 'untranslated')
+
+
+def issue_languages(issue, target_languages):
+    """Languages an issue applies to: its locale crawl's language, or every target for a shared crawl."""
+    return [issue['language']] if issue.get('language') else target_languages
+
+
+def apply_suggestions(issue, translations_map, target_languages, is_mock):
+    """Copies translations for the issue's text into its suggestion_<lang> fields."""
+    if issue['type'] not in TRANSLATABLE_TYPES:
+        return
+    for lang in issue_languages(issue, target_languages):
+        translation = None
+        if is_mock:
+            translation = f"[MOCK] {issue['text']}"
+        elif lang in translations_map and issue['text'] in translations_map[lang]:
+            translation = translations_map[lang][issue['text']]
+
+        if translation:
+            issue[f'suggestion_{lang}'] = translation
+
+
+class Pipeline:
+    """
+    Streaming crawl -> analyze -> translate pipeline.
+
+    Crawlers hand each page to a bounded queue (see Crawler.on_page); the analyze
+    stage checks the strings not seen before on the site and passes new issues to a
+    second bounded queue; the translate stage picks them up in micro-batches,
+    attaches suggestions and pushes them to the dataset right away. Full queues
+    block the stage before them, so memory stays flat whatever maxPages is.
+    """
+
+    def __init__(self, analyzer, lingo_client, target_languages, is_mock,
+                 page_queue_size=20, issue_queue_size=500, translate_batch_size=50, analysis_pool=None):
+        self.analyzer = analyzer
+        # Optional AnalysisPool: detection runs in worker processes, off the event loop
+        self.analysis_pool = analysis_pool
+        # Normalized strings sent to the pool and not yet cached by the detector
+        self._submitted = set()
+        self.lingo_client = lingo_client
+        self.target_languages = target_languages
+        self.is_mock = is_mock
+        self.translate_batch_size = translate_batch_size
+        self.page_queue = asyncio.Queue(maxsize=page_queue_size)
+        self.issue_queue = asyncio.Queue(maxsize=issue_queue_size)
+        # One string index per crawl language (None = shared crawl)
+        self.indexes = {}
+        # Unique issues as compact IssueRecords; occurrences keep growing through the shared urls lists
+        self.issues = []
+        self.pages_analyzed = 0
+
+    def page_sink(self, lang):
+        """Crawler.on_page callback for the crawl of `lang` (None for a shared crawl)."""
+        async def put(page):
+            await self.page_queue.put((lang, page))
+        return put
+
+    async def run(self, crawl_coroutines):
+        """Runs the crawls and both stages to completion. Returns every unique issue as an IssueRecord."""
+        async def crawl():
+            await asyncio.gather(*crawl_coroutines)
+            await self.page_queue.put(None)
+
+        # If a stage fails, the others are cancelled instead of blocking on a full queue
+        stages = [asyncio.create_task(coro) for coro in (crawl(), self._analyze_stage(), self._translate_stage())]
+        try:
+            await asyncio.gather(*stages)
+        except BaseException:
+            for stage in stages:
+                stage.cancel()
+            raise
+
+        Actor.log.info(
+            f"Pipeline done: {self.pages_analyzed} pages, "
+            f"{sum(len(index) for index in self.indexes.values())} unique strings, {len(self.issues)} issues"
+        )
+        return self.issues
+
+    async def run_issues(self, issues):
+        """Translates and pushes issues found without a crawl (sourceType 'json'). Returns their IssueRecords."""
+        for start in range(0, len(issues), self.translate_batch_size):
+            await self._translate_batch(issues[start:start + self.translate_batch_size])
+        Actor.log.info(f"Pipeline done: {len(self.issues)} issues")
+        return self.issues
+
+    async def _analyze_stage(self):
+        # Pages keep their crawl order through both halves, so issues come out in order
+        detected = asyncio.Queue(maxsize=2 * self.analysis_pool.workers if self.analysis_pool else 1)
+        await asyncio.gather(self._detect_stage(detected), self._check_stage(detected))
+
+    async def _detect_stage(self, detected):
+        """With a pool: starts detection of each page's uncached strings while earlier pages are checked."""
+        while True:
+            entry = await self.page_queue.get()
+            if entry is None:
+                await detected.put(None)
+                return
+            lang, page = entry
+            job, keys = None, []
+            if self.analysis_pool is not None:
+                # Strings already on their way for an earlier page are cached by the time this one is checked
+                keys = [key for key in self.analyzer.detector.missing(self.analyzer.detection_texts(page, lang))
+                        if key not in self._submitted]
+                self._submitted.update(keys)
+                if keys:
+                    job = asyncio.ensure_future(self.analysis_pool.detect(keys))
+            await detected.put((lang, page, job, keys))
+
+    async def _check_stage(self, detected):
+        while True:
+            entry = await detected.get()
+            if entry is None:
+                await self.issue_queue.put(None)
+                return
+            lang, page, job, keys = entry
+            index = self.indexes.setdefault(lang, SiteStringIndex())
+            if job is not None:
+                try:
+                    with metrics.timer('detect_pool'):
+                        self.analyzer.detector.remember_many(keys, await job)
+                except Exception as e:
+                    # prepare() below detects them inline instead
+                    Actor.log.warning(f"Analysis pool failed for {page['url']}: {e}")
+                self._submitted.difference_update(keys)
+
+            # One detection batch per page; strings seen on earlier pages are cache hits
+            with metrics.timer('analyze'):
+                self.analyzer.prepare([page])
+                _, new_issues = self.analyzer.analyze_new_strings(page, index, expected_language=lang)
+            self.pages_analyzed += 1
+            for issue in new_issues:
+                issue['language'] = lang
+                await self.issue_queue.put(issue)
+            # Yield so crawl workers and the translate stage get the loop between pages
+            await asyncio.sleep(0)
+
+    async def _translate_stage(self):
+        done = False
+        while not done:
+            batch = [await self.issue_queue.get()]
+            while len(batch) < self.translate_batch_size and not self.issue_queue.empty():
+                batch.append(self.issue_queue.get_nowait())
+            if batch[-1] is None:
+                batch.pop()
+                done = True
+            if batch:
+                await self._translate_batch(batch)
+
+    async def _translate_batch(self, batch):
+        translations_map = {}
+        if not self.is_mock:
+            texts = {lang: set() for lang in self.target_languages}
+            for issue in batch:
+                if issue['type'] in TRANSLATABLE_TYPES:
+                    for lang in issue_languages(issue, self.target_languages):
+                        texts[lang].add(issue['text'])
+            langs = [lang for lang in self.target_languages if texts[lang]]
+            with metrics.timer('translate_batch'):
+                results = await asyncio.gather(*(
+                    self.lingo_client.suggest_translation_batch(list(texts[lang]), lang) for lang in langs
+                ))
+            translations_map = dict(zip(langs, results))
+
+        rows = []
+        for issue in batch:
+            apply_suggestions(issue, translations_map, self.target_languages, self.is_mock)
+            self.issues.append(IssueRecord.from_dict(issue))
+            # No occurrences: the string may still turn up on pages crawled after this
+            # push, so the final counts only exist in the end-of-run reports
+            row = {key: value for key, value in issue.items() if key not in ('urls', 'occurrences')}
+            row['recordType'] = 'issue'
+            rows.append(row)
+        with metrics.timer('push'):
+            await Actor.push_data(rows)
+        metrics.count('issues_pushed', len(rows))
@@ -0,0 +1,114 @@
+import re
+from collections import Counter, namedtuple
+from functools import lru_cache
+
+# Every placeholder syntax in one precompiled alternation, so a string is scanned once:
+#   {{name}} / {{{raw}}} / {{#if x}}      handlebars / mustache / i18next
+#   '{literal}'                           ICU quoted text (not a placeholder)
+#   {name} / {0} / {count, plural, ...}   ICU MessageFormat argument (opening part)
+#   { }                                   any other brace (ICU plural/select branch bodies)
+#   %s / %1$s / %.2f / %(name)s / %@      printf and python-format
+#   %%                                    literal percent
+#   :name                                 Laravel / Rails style named
+#   <b> </b> <a href=..> <br/>            HTML tags, compared by name only
+# The leading lookahead lets the scan skip ordinary characters without trying every branch.
+TOKEN_PATTERN = re.compile(r"""
+  (?=[{}'%:<]) (?:
+    (?P<handlebars>\{\{\{?[^{}]*\}\}\}?)
+  | (?P<quoted>'[{}][^']*')
+  | \{\s*(?P<arg>[A-Za-z_$][\w.$-]*|\d+)\s*(?:,\s*(?P<format>\w+))?
+  | (?P<brace>[{}])
+  | (?P<printf>%(?:\d+\$|\(\w+\))?[-+0\#]*(?:\d+|\*)?(?:\.\d+)?(?:hh|h|ll|l|L|z|j|t)?[sdifuxXeEgGc@])
+  | %%
+  | (?<![\w:/]):(?P<named>[A-Za-z_]\w*)
+  | <(?P<close>/)?(?P<tag>[A-Za-z][\w-]*)(?:\s[^<>]*)?(?P<void>/)?>
+  )
+""", re.VERBOSE)
+
+# Cheap pre-check: strings without any of these characters have no placeholders
+TRIGGER = re.compile(r"[{}%:<]")
+
+# ICU arguments whose {...} parts are message branches, not arguments
+COMPLEX_FORMATS = {'plural', 'select', 'selectordinal'}
+
+Placeholders = namedtuple('Placeholders', ['tokens', 'ordered', 'broken'])
+NONE = Placeholders((), (), None)
+
+
+@lru_cache(maxsize=65536)
+def tokenize(text):
+    """
+    Placeholders(tokens, ordered, broken) for one string.
+    `tokens` are normalized placeholders in order of appearance ('{{name}}',
+    '{count}', '%1$s', ':name', '<b>'), `ordered` the non-positional printf ones
+    whose order matters, and `broken` a description of unbalanced braces or None.
+    """
+    if not TRIGGER.search(text):
+        return NONE
+
+    tokens = []
+    ordered = []
+    # Open braces: 'arg' (an ICU argument), 'complex' (plural/select awaiting branches), 'body' (a branch)
+    stack = []
+    for match in TOKEN_PATTERN.finditer(text):
+        kind = match.lastgroup
+        if kind == 'handlebars':
+            tokens.append('{{' + ' '.join(match.group().strip('{} ').split()) + '}}')
+        elif kind in ('arg', 'format'):
+            if stack and stack[-1] == 'complex':
+                # `other {items}`: a branch body that happens to start with a word
+                stack.append('body')
+                continue
+            tokens.append('{' + match.group('arg') + '}')
+            stack.append('complex' if match.group('format') in COMPLEX_FORMATS else 'arg')
+        elif kind == 'brace':
+            if match.group() == '{':
+                stack.append('body' if stack and stack[-1] == 'complex' else 'text')
+            elif stack:
+                stack.pop()
+            else:
+                return Placeholders(tuple(tokens), tuple(ordered), f"unmatched '}}' at {match.start()}")
+        elif kind == 'printf':
+            token = match.group()
+            tokens.append(token)
+            if '$' not in token and '(' not in token:
+                ordered.append(token)
+        elif kind == 'named':
+            tokens.append(':' + match.group('named'))
+        elif kind in ('tag', 'close', 'void'):
+            tokens.append(f"<{match.group('close') or ''}{match.group('tag').lower()}{match.group('void') or ''}>")
+
+    broken = f"unclosed '{{' ({len(stack)} open)" if stack else None
+    return Placeholders(tuple(tokens), tuple(ordered), broken)
+
+
+def compare(base_text, text):
+    """
+    Placeholder differences between a source string and its translation:
+    (missing, extra) token lists, plus an order flag for non-positional printf
+    tokens. Returns None when both carry the same placeholders.
+    """
+    base = tokenize(base_text)
+    target = tokenize(text)
+    if base.tokens == target.tokens:
+        return None
+    base_counts = Counter(base.tokens)
+    counts = Counter(target.tokens)
+    missing = sorted((base_counts - counts).elements())
+    extra = sorted((counts - base_counts).elements())
+    if not missing and not extra and base.ordered == target.ordered:
+        # Same set, reordered: fine for named/positional placeholders
+        return None
+    return {'missing': missing, 'extra': extra, 'reordered': not missing and not extra}
+
+
+def describe(diff):
+    """Human-readable summary of a compare() result."""
+    parts = []
+    if diff['missing']:
+        parts.append(f"missing {' '.join(diff['missing'])}")
+    if diff['extra']:
+        parts.append(f"unexpected {' '.join(diff['extra'])}")
+    if diff['reordered']:
+        parts.append('printf placeholders reordered without positions')
+    return '; '.join(parts)
@@ -0,0 +1,73 @@
+import sys
+
+# Issue fields stored as slots; anything else an issue carries goes to `extra`
+ISSUE_FIELDS = ('type', 'severity', 'text', 'key', 'context', 'url', 'urls', 'language', 'details', 'confidence')
+SUGGESTION_PREFIX = 'suggestion_'
+
+
+def _intern(value):
+    return sys.intern(value) if isinstance(value, str) else value
+
+
+class IssueRecord:
+    """
+    Compact, slotted form of an issue kept for the end-of-run reports.
+
+    Type, severity, language and URL are interned, so the hundreds of thousands
+    of records of a big run share one copy of each. `urls` is the live list
+    from the site string index, so `occurrences` is always current.
+    """
+    __slots__ = ISSUE_FIELDS + ('suggestions', 'extra')
+
+    def __init__(self, type, text, severity=None, key=None, context=None, url=None, urls=None,
+                 language=None, details=None, confidence=None, suggestions=None, extra=None):
+        self.type = _intern(type)
+        self.severity = _intern(severity)
+        self.text = text
+        self.key = key
+        self.context = context
+        self.url = _intern(url)
+        self.urls = urls if urls is not None else ([self.url] if url else [])
+        self.language = _intern(language)
+        self.details = details
+        self.confidence = confidence
+        # {lang: suggested translation}
+        self.suggestions = suggestions or {}
+        self.extra = extra or None
+
+    @classmethod
+    def from_dict(cls, issue):
+        fields = {}
+        suggestions = {}
+        extra = {}
+        for name, value in issue.items():
+            if name in ISSUE_FIELDS:
+                fields[name] = value
+            elif name.startswith(SUGGESTION_PREFIX):
+                suggestions[name[len(SUGGESTION_PREFIX):]] = value
+            elif name != 'occurrences':
+                extra[name] = value
+        return cls(suggestions=suggestions, extra=extra, **fields)
+
+    @property
+    def occurrences(self):
+        return len(self.urls) or 1
+
+    def suggestion(self, lang):
+        return self.suggestions.get(lang)
+
+    def to_dict(self):
+        """The issue as the dict the reports have always used."""
+        issue = {'type': self.type, 'text': self.text, 'key': self.key, 'severity': self.severity,
+                 'context': self.context}
+        if self.details is not None:
+            issue['details'] = self.details
+        if self.confidence is not None:
+            issue['confidence'] = self.confidence
+        if self.extra:
+            issue.update(self.extra)
+        issue.update({'language': self.language, 'url': self.url, 'urls': self.urls,
+                      'occurrences': self.occurrences})
+        for lang, suggestion in self.suggestions.items():
+            issue[f'{SUGGESTION_PREFIX}{lang}'] = suggestion
+        return issue
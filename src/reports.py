@@ -0,0 +1,93 @@
+from apify import Actor
+import csv
+import json
+import os
+import tempfile
+
+CSV_COLUMNS = ['url', 'language', 'type', 'severity', 'text_found', 'occurrences', 'context', 'detected_lang']
+
+
+def fallback_key(text):
+    """Export key for an issue whose item had no id/name."""
+    return text[:20].strip().replace(' ', '_').lower()
+
+
+def write_detailed_report(records, f):
+    """Writes the issues as a JSON array, one record at a time."""
+    f.write('[')
+    for n, record in enumerate(records):
+        f.write(',\n' if n else '\n')
+        f.write(json.dumps(record.to_dict(), ensure_ascii=False))
+    f.write('\n]\n')
+
+
+def write_csv(records, f, target_languages):
+    writer = csv.writer(f)
+    writer.writerow(CSV_COLUMNS + [f'suggestion_{lang}' for lang in target_languages])
+    for record in records:
+        writer.writerow([
+            record.url, record.language or '', record.type, record.severity, record.text,
+            record.occurrences, record.context, record.details or '',
+            *(record.suggestion(lang) or '' for lang in target_languages),
+        ])
+
+
+def write_i18n(records, f, lang):
+    """Streams {key: suggestion} for one language as a JSON object. Returns the number of keys."""
+    seen = set()
+    f.write('{')
+    for record in records:
+        suggestion = record.suggestion(lang)
+        if not suggestion:
+            continue
+        key = record.key or fallback_key(record.text)
+        if key in seen:
+            continue
+        f.write(',\n' if seen else '\n')
+        seen.add(key)
+        f.write(f"  {json.dumps(key, ensure_ascii=False)}: {json.dumps(suggestion, ensure_ascii=False)}")
+    f.write('\n}\n' if seen else '}\n')
+    return len(seen)
+
+
+async def upload(key, path, content_type):
+    """
+    Stores a report file in the default key-value store. On the platform the
+    client streams the open file in chunks; the local file storage needs the
+    value itself (and serializes JSON records on its own).
+    """
+    with open(path, 'rb') as f:
+        if Actor.is_at_home():
+            value = f
+        elif content_type.startswith('application/json'):
+            value = json.load(f)
+        else:
+            value = f.read()
+        await Actor.set_value(key, value, content_type=content_type)
+
+
+async def export_reports(records, target_languages):
+    """
+    Writes DETAILED_REPORT, i18n_<lang>.json and localization_issues.csv.
+    Each file is streamed to disk from the compact records, then uploaded, so
+    no second in-memory copy of the report is ever built.
+    """
+    with tempfile.TemporaryDirectory() as tmp:
+        path = os.path.join(tmp, 'report')
+
+        with open(path, 'w', encoding='utf-8') as f:
+            write_detailed_report(records, f)
+        await upload('DETAILED_REPORT', path, 'application/json; charset=utf-8')
+
+        # Generate i18n JSONs (GitHub-ready): { key: translation } per language
+        for lang in target_languages:
+            with open(path, 'w', encoding='utf-8') as f:
+                keys = write_i18n(records, f, lang)
+            if keys:
+                await upload(f'i18n_{lang}.json', path, 'application/json; charset=utf-8')
+                Actor.log.info(f"Exported i18n_{lang}.json with {keys} keys.")
+
+        if records:
+            with open(path, 'w', encoding='utf-8', newline='') as f:
+                write_csv(records, f, target_languages)
+            await upload('localization_issues.csv', path, 'text/csv')
@@ -0,0 +1,116 @@
+from apify import Actor
+import gzip
+import hashlib
+import json
+
+# Issue fields that come from the item or the crawl, not from the check itself
+ITEM_FIELDS = ('text', 'key', 'context', 'url', 'urls', 'occurrences', 'language')
+
+
+def items_hash(items):
+    """Content hash of a page's extracted item list."""
+    return hashlib.sha1(json.dumps(items, sort_keys=True, ensure_ascii=False).encode('utf-8')).hexdigest()
+
+
+def state_record_key(url):
+    """Key-value store record for one site's scan state (record keys allow only a small charset)."""
+    return f"scan-{hashlib.sha1(url.encode('utf-8')).hexdigest()[:16]}"
+
+
+class ScanState:
+    """
+    What the previous run saw, for incremental re-scans.
+
+    Per URL it keeps the HTTP validators (ETag / Last-Modified), a hash of the
+    extracted items, the items and the page links. A page that answers 304, or
+    whose items hash the same as last time, is unchanged: its stored items are
+    replayed and the Analyzer reuses the stored verdicts (issues per text and
+    page language) instead of running detection again. Verdicts are only
+    reused when the analysis settings (`fingerprint`) match the previous run.
+    Only the pages reached in this run are written back.
+    """
+
+    def __init__(self, fingerprint, data=None):
+        data = data or {}
+        self.fingerprint = fingerprint
+        self._previous_pages = data.get('pages', {})
+        self.reuse_analysis = data.get('fingerprint') == fingerprint
+        self._previous_verdicts = {}
+        if self.reuse_analysis:
+            for lang, text, verdicts in data.get('verdicts', []):
+                self._previous_verdicts[(text, lang)] = verdicts
+        self.pages = {}
+        self.verdicts = {}
+        self._store = None
+        self._record_key = None
+        self.counts = {'not_modified': 0, 'unchanged': 0, 'changed': 0, 'new': 0}
+
+    @classmethod
+    async def open_from_store(cls, store_name, url, fingerprint):
+        """Loads the state of the site at `url` from a named key-value store (or starts empty)."""
+        store = await Actor.open_key_value_store(name=store_name)
+        record_key = state_record_key(url)
+        raw = await store.get_value(record_key)
+        data = json.loads(gzip.decompress(raw)) if raw else None
+        state = cls(fingerprint, data)
+        state._store = store
+        state._record_key = record_key
+        Actor.log.info(
+            f"Scan state loaded from store '{store_name}': {len(state._previous_pages)} pages"
+            f"{'' if state.reuse_analysis or not data else ' (analysis settings changed, re-analyzing)'}"
+        )
+        return state
+
+    async def persist(self):
+        if self._store is None:
+            return
+        data = {
+            'fingerprint': self.fingerprint,
+            'pages': self.pages,
+            'verdicts': [[lang, text, verdicts] for (text, lang), verdicts in self.verdicts.items()],
+        }
+        raw = gzip.compress(json.dumps(data, ensure_ascii=False).encode('utf-8'))
+        await self._store.set_value(self._record_key, raw, content_type='application/octet-stream')
+
+    def validators(self, url):
+        """Conditional request headers for a page seen in the previous run ({} if none)."""
+        record = self._previous_pages.get(url)
+        if not record:
+            return {}
+        headers = {}
+        if record.get('etag'):
+            headers['If-None-Match'] = record['etag']
+        if record.get('lastModified'):
+            headers['If-Modified-Since'] = record['lastModified']
+        return headers
+
+    def reuse(self, url):
+        """The server said 304: carries the stored page over to this run and returns it."""
+        record = self.pages[url] = self._previous_pages[url]
+        self.counts['not_modified'] += 1
+        return record
+
+    def record(self, url, items, links, etag=None, last_modified=None):
+        """Stores a freshly extracted page. Returns True when its items are the same as last run."""
+        digest = items_hash(items)
+        previous = self._previous_pages.get(url)
+        self.pages[url] = {'etag': etag, 'lastModified': last_modified, 'hash': digest, 'items': items, 'links': links}
+        if previous is None:
+            self.counts['new'] += 1
+            return False
+        unchanged = previous['hash'] == digest
+        self.counts['unchanged' if unchanged else 'changed'] += 1
+        return unchanged
+
+    def verdict(self, text, lang):
+        """Issues (without item fields) the previous run found for this text on a `lang` page."""
+        return self._previous_verdicts.get((text, lang), [])
+
+    def remember(self, text, lang, issues):
+        if issues:
+            self.verdicts[(text, lang)] = [
+                {key: value for key, value in issue.items() if key not in ITEM_FIELDS} for issue in issues
+            ]
+
+    def stats(self):
+        return dict(self.counts, verdicts=len(self.verdicts), reused_analysis=self.reuse_analysis)
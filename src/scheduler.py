@@ -0,0 +1,197 @@
+from apify import Actor
+import asyncio
+import time
+from contextlib import asynccontextmanager
+from email.utils import parsedate_to_datetime
+from urllib.parse import urlsplit
+
+# Responses that mean "slow down" rather than "this page is broken"
+THROTTLE_STATUSES = (429, 503)
+
+# A host is slowing down when its smoothed latency exceeds its best by this factor
+SLOWDOWN_FACTOR = 2.0
+# ...and by at least this much (seconds), so jitter on a fast host is not read as load
+MIN_SLOWDOWN = 0.25
+# Longest pause honoured from a Retry-After header (seconds)
+MAX_PAUSE = 120.0
+MAX_BACKOFF = 60.0
+
+
+class RetryableError(Exception):
+    """A fetch failed in a way worth another try later (throttling, timeouts, a crashed browser)."""
+
+
+class Throttled(RetryableError):
+    """Raised by a fetch that got 429/503; the scheduler backs the host off and the URL is retried."""
+
+    def __init__(self, retry_after=None):
+        super().__init__(f"throttled (retry after {retry_after}s)" if retry_after else "throttled")
+        self.retry_after = retry_after
+
+
+def parse_retry_after(value):
+    """Retry-After in seconds (delta-seconds or an HTTP date), None if absent or unreadable."""
+    if not value:
+        return None
+    value = value.strip()
+    if value.isdigit():
+        return float(value)
+    try:
+        return max(0.0, parsedate_to_datetime(value).timestamp() - time.time())
+    except (TypeError, ValueError):
+        return None
+
+
+class HostState:
+    """
+    Concurrency window for one host, AIMD style: +1/limit per healthy response,
+    x0.75 when latency climbs well above the best seen, x0.5 plus a pause on 429/503.
+    It starts fully open, so a host that copes never runs slower than the
+    crawlers' own concurrency.
+    """
+
+    def __init__(self, max_limit, min_delay=0.0):
+        self.max_limit = max_limit
+        self.limit = float(max_limit)
+        self.min_delay = min_delay
+        self.in_flight = 0
+        self.next_start = 0.0
+        self.paused_until = 0.0
+        self.latency = None
+        self.baseline = None
+        self.backoff = 0.0
+        self.cooldown_until = 0.0
+        self.throttled = 0
+        self.slowdowns = 0
+        self.requests = 0
+        self.changed = asyncio.Condition()
+
+    def _ready_in(self, now):
+        """Seconds until a new request may start (0 = now), or None while the window is full."""
+        if self.in_flight >= int(self.limit):
+            return None
+        return max(0.0, self.paused_until - now, self.next_start - now)
+
+    async def acquire(self):
+        async with self.changed:
+            while True:
+                now = time.monotonic()
+                wait = self._ready_in(now)
+                if wait == 0:
+                    break
+                try:
+                    await asyncio.wait_for(self.changed.wait(), timeout=wait)
+                except asyncio.TimeoutError:
+                    pass
+            self.in_flight += 1
+            self.requests += 1
+            self.next_start = now + self.min_delay
+
+    async def release(self):
+        async with self.changed:
+            self.in_flight -= 1
+            self.changed.notify_all()
+
+    def on_response(self, seconds):
+        now = time.monotonic()
+        self.backoff = 0.0
+        self.latency = seconds if self.latency is None else 0.8 * self.latency + 0.2 * seconds
+        # The baseline drifts up slowly so one lucky fast start does not pin the window at 1
+        self.baseline = self.latency if self.baseline is None else min(self.latency, self.baseline * 1.01)
+        if self.latency > self.baseline * SLOWDOWN_FACTOR and self.latency - self.baseline > MIN_SLOWDOWN:
+            if now >= self.cooldown_until:
+                self.limit = max(1.0, self.limit * 0.75)
+                self.slowdowns += 1
+                self.cooldown_until = now + max(1.0, 2 * self.latency)
+        else:
+            self.limit = min(float(self.max_limit), self.limit + 1 / self.limit)
+
+    def on_throttled(self, retry_after=None):
+        now = time.monotonic()
+        self.throttled += 1
+        self.limit = max(1.0, self.limit / 2)
+        self.backoff = min(MAX_BACKOFF, self.backoff * 2 or 1.0)
+        pause = min(MAX_PAUSE, retry_after if retry_after is not None else self.backoff)
+        self.paused_until = max(self.paused_until, now + pause)
+        self.cooldown_until = now + pause
+
+
+class HostScheduler:
+    """
+    Per-host politeness shared by every crawler of a run. Each request holds a
+    slot of its host while it is on the network (not while its page is parsed
+    or waits for the analysis pipeline); the number of slots adapts to the
+    response times and throttling the host shows. A robots.txt Crawl-delay
+    becomes the minimum spacing between request starts.
+
+    Every crawler registered on a host brings `max_concurrency` slots, so locale
+    crawls of one site still run side by side. `per_host_limit` caps a host at a
+    fixed number instead, trading locale parallelism for a lighter load on the site.
+    """
+
+    def __init__(self, max_concurrency, per_host_limit=None):
+        self.max_concurrency = max(1, max_concurrency)
+        self.per_host_limit = per_host_limit
+        self.hosts = {}
+        self._crawlers = {}
+
+    @staticmethod
+    def _name(url):
+        return (urlsplit(url).hostname or '').lower()
+
+    def _max_limit(self, name):
+        if self.per_host_limit:
+            return max(1, self.per_host_limit)
+        return self.max_concurrency * max(1, self._crawlers.get(name, 0))
+
+    def _host(self, url):
+        name = self._name(url)
+        state = self.hosts.get(name)
+        if state is None:
+            state = self.hosts[name] = HostState(self._max_limit(name))
+        return state
+
+    def register(self, url):
+        """A crawler will work on url's host; widens that host's window by its share."""
+        name = self._name(url)
+        self._crawlers[name] = self._crawlers.get(name, 0) + 1
+        state = self._host(url)
+        state.max_limit = self._max_limit(name)
+        state.limit = float(state.max_limit)
+
+    def set_min_delay(self, url, seconds):
+        self._host(url).min_delay = seconds
+
+    @asynccontextmanager
+    async def slot(self, url):
+        host = self._host(url)
+        await host.acquire()
+        started = time.monotonic()
+        try:
+            yield
+        except Throttled as e:
+            host.on_throttled(e.retry_after)
+            Actor.log.warning(
+                f"{urlsplit(url).hostname} is throttling ({e}), window down to {int(host.limit)}"
+            )
+            raise
+        else:
+            host.on_response(time.monotonic() - started)
+        finally:
+            await host.release()
+
+    def stats(self):
+        return {
+            'hosts': len(self.hosts),
+            'requests': sum(host.requests for host in self.hosts.values()),
+            'throttled': sum(host.throttled for host in self.hosts.values()),
+            'slowdowns': sum(host.slowdowns for host in self.hosts.values()),
+        }
+
+    def log_summary(self):
+        for name, host in sorted(self.hosts.items()):
+            latency = f"{host.latency * 1000:.0f} ms" if host.latency is not None else 'n/a'
+            Actor.log.info(
+                f"  {name}: {host.requests} requests, window {int(host.limit)}/{host.max_limit}, "
+                f"latency {latency}, {host.throttled} throttled, {host.slowdowns} slowdowns"
+            )
@@ -0,0 +1,196 @@
+import json
+import math
+import os
+import re
+import unicodedata
+from array import array
+from bisect import bisect_left
+from src.detection import normalize_language
+from src.lexicon import load_lexicon
+
+# Verdicts for a short string on a page
+PAGE = 'page'            # reads as the page language (or is not language at all): no issue
+BASE = 'base'            # reads as the base language: a fallback
+AMBIGUOUS = 'ambiguous'  # cannot tell locally: escalated as suspected_mixed
+
+WORD = re.compile(r"[^\W\d_]+")
+# Mean per-trigram log-probability gap above which a string reads as the page language.
+# Trigrams alone never convict a string of being a fallback (brand names read as
+# English too); a gap the other way only annotates the escalated issue.
+NGRAM_MARGIN = 0.5
+# Log-probability of a trigram a language profile has never seen
+UNSEEN = math.log(1e-6)
+# Share of a language's letter frequency that defines its scripts
+SCRIPT_COVERAGE = 0.95
+# langdetect profile names that are not the bare language code
+PROFILE_NAMES = {'zh': 'zh-cn'}
+
+# Terms that are the same in every language
+BUILTIN_ALLOWLIST = (
+    'ok', 'faq', 'api', 'url', 'pdf', 'sms', 'gps', 'usb', 'wi-fi', 'ios', 'android', 'iphone', 'ipad',
+    'mac', 'windows', 'linux', 'html', 'css', 'json', 'csv', 'qr', 'id', 'vip', 'ceo', 'cto',
+)
+
+
+def is_address(token):
+    """A URL or e-mail address token; language-neutral on any page."""
+    return '@' in token or '://' in token or token.lower().startswith('www.')
+
+
+def text_words(text):
+    """Letter runs of `text`, leaving out URL and e-mail tokens."""
+    return [word for token in text.split() if not is_address(token) for word in WORD.findall(token)]
+
+
+def script(char):
+    """Unicode script of a letter, e.g. LATIN, CYRILLIC, DEVANAGARI, CJK."""
+    try:
+        return unicodedata.name(char).split(' ', 1)[0]
+    except ValueError:
+        return None
+
+
+def text_scripts(text):
+    return {script(char) for char in text if char.isalpha()}
+
+
+class NgramModel:
+    """
+    A language's trigram log-probabilities from the langdetect profile, as a
+    sorted tuple of trigrams plus a parallel float array (bisect lookups).
+    """
+
+    def __init__(self, lang):
+        import langdetect
+        path = os.path.join(os.path.dirname(langdetect.__file__), 'profiles', PROFILE_NAMES.get(lang, lang))
+        with open(path, encoding='utf-8') as f:
+            profile = json.load(f)
+        freq = profile['freq']
+        total = profile['n_words'][2]
+        trigrams = {}
+        for gram, count in freq.items():
+            if len(gram) == 3:
+                key = gram.lower()
+                trigrams[key] = trigrams.get(key, 0) + count
+        self.grams = tuple(sorted(trigrams))
+        self.logprobs = array('f', (math.log(trigrams[gram] / total) for gram in self.grams))
+
+        letters = sorted(((count, gram) for gram, count in freq.items() if len(gram) == 1 and gram.isalpha()), reverse=True)
+        letter_total = sum(count for count, _ in letters)
+        self.scripts = set()
+        covered = 0
+        for count, letter in letters:
+            if covered >= SCRIPT_COVERAGE * letter_total:
+                break
+            self.scripts.add(script(letter))
+            covered += count
+
+    def logprob(self, gram):
+        i = bisect_left(self.grams, gram)
+        if i < len(self.grams) and self.grams[i] == gram:
+            return self.logprobs[i]
+        return UNSEEN
+
+    def score(self, words):
+        """Mean trigram log-probability of the words (padded with spaces, as in the profiles)."""
+        grams = [padded[i:i + 3] for word in words for padded in (f" {word} ",) for i in range(len(padded) - 2)]
+        return sum(self.logprob(gram) for gram in grams) / len(grams) if grams else UNSEEN
+
+
+class ShortStringVerifier:
+    """
+    Decides whether a short UI string (button, nav label, badge) on a page reads
+    as the page language, as the base language, or neither can be told. Cheap
+    local evidence only, in order: the allowlist (brands, technical terms,
+    acronyms, no letters at all), the script, the per-language UI word lists
+    (src/lexicon.py) and the langdetect trigram profiles. Only AMBIGUOUS strings
+    are worth a human or model look.
+    """
+
+    def __init__(self, base_language='en', allowlist=None):
+        self.base_language = normalize_language(base_language)
+        self.allowlist = {term.casefold() for term in (*BUILTIN_ALLOWLIST, *(allowlist or []))}
+        self._lexicons = {}
+        self._models = {}
+        self.stats = {PAGE: 0, BASE: 0, AMBIGUOUS: 0}
+
+    def lexicon(self, lang):
+        if lang not in self._lexicons:
+            self._lexicons[lang] = load_lexicon(lang)
+        return self._lexicons[lang]
+
+    def model(self, lang):
+        if lang not in self._models:
+            try:
+                self._models[lang] = NgramModel(lang)
+            except (ImportError, OSError):
+                self._models[lang] = None
+        return self._models[lang]
+
+    def allowed(self, text):
+        """
+        Allowlisted as a whole, or made only of allowlisted terms, acronyms,
+        URLs/e-mails and non-letters. An all-caps base-language word ("LOGIN",
+        "MY CART") is styling, not an acronym.
+        """
+        if text.strip().casefold() in self.allowlist:
+            return True
+        base_lexicon = self.lexicon(self.base_language)
+        return all(
+            word.casefold() in self.allowlist or (
+                word.isupper() and len(word) <= 5
+                and (base_lexicon is None or word.lower() not in base_lexicon)
+            )
+            for word in text_words(text)
+        )
+
+    def same_in(self, text, lang):
+        """Every word of `text` is also a `lang` word or loanword ("Blog", "Menu" in French), so it may stay as is."""
+        lexicon = self.lexicon(normalize_language(lang))
+        words = text_words(text)
+        return lexicon is not None and bool(words) and all(word.lower() in lexicon for word in words)
+
+    def verify(self, text, page_lang):
+        """(verdict, reason) for `text` found on a `page_lang` page."""
+        verdict, reason = self._verify(text, normalize_language(page_lang))
+        self.stats[verdict] += 1
+        return verdict, reason
+
+    def _verify(self, text, page_lang):
+        if page_lang == self.base_language or self.allowed(text):
+            return PAGE, None
+        words = [word.lower() for word in text_words(text)]
+
+        page_lexicon = self.lexicon(page_lang)
+        base_lexicon = self.lexicon(self.base_language)
+        content = [word for word in words if len(word) > 1] or words
+        in_page = sum(1 for word in content if page_lexicon is not None and word in page_lexicon)
+        in_base = sum(1 for word in content if base_lexicon is not None and word in base_lexicon)
+
+        page_model = self.model(page_lang)
+        base_model = self.model(self.base_language)
+        if page_model is None or base_model is None:
+            if in_page == len(content):
+                return PAGE, None
+            return (BASE, f"{self.base_language} UI words") if in_base == len(content) else (AMBIGUOUS, None)
+
+        scripts = text_scripts(' '.join(words))
+        if not scripts & page_model.scripts:
+            # e.g. Latin text on a Hindi page: a fallback if it is known base-language UI text
+            if scripts <= base_model.scripts and in_base == len(content):
+                return BASE, f"{self.base_language} UI words"
+            return AMBIGUOUS, f"{'/'.join(sorted(scripts))} script on a {page_lang} page"
+        if not page_model.scripts & base_model.scripts:
+            # Written in the page's script, which the base language does not use
+            return PAGE, None
+
+        if in_page == len(content):
+            return PAGE, None
+        if in_base == len(content):
+            return BASE, f"{self.base_language} UI words"
+        gap = page_model.score(words) - base_model.score(words)
+        if gap >= NGRAM_MARGIN:
+            return PAGE, None
+        if gap <= -NGRAM_MARGIN:
+            return AMBIGUOUS, f"reads as {self.base_language} (trigram score {gap:+.1f})"
+        return AMBIGUOUS, f"trigram score {gap:+.1f} between {page_lang} and {self.base_language}"
@@ -0,0 +1,44 @@
+import sys
+
+
+class SiteStringIndex:
+    """
+    Site-wide index of extracted strings: each unique (text, type, page language)
+    maps to the URLs it appears on. Headers, footers and nav menus collapse to
+    one entry however many pages repeat them.
+    """
+
+    def __init__(self):
+        # (text, type, page_lang) -> [urls]. Only the first page's item is analyzed,
+        # so items themselves (with their context snippets) are not kept.
+        self._entries = {}
+        self.total_items = 0
+
+    def add_page(self, url, items, page_lang):
+        """
+        Records the page's items. Returns [(item, urls)] for the strings seen for the
+        first time; `urls` is the live list that later pages keep appending to.
+        """
+        url = sys.intern(url)
+        new_entries = []
+        for item in items:
+            self.total_items += 1
+            key = (item['text'], item['type'], page_lang)
+            urls = self._entries.get(key)
+            if urls is None:
+                urls = self._entries[key] = [url]
+                new_entries.append((item, urls))
+            elif urls[-1] != url:
+                urls.append(url)
+        return new_entries
+
+    def __len__(self):
+        return len(self._entries)
+
+    def __iter__(self):
+        """Yields (text, type, page_lang, urls) in first-seen order."""
+        for (text, t_type, page_lang), urls in self._entries.items():
+            yield text, t_type, page_lang, urls
+
+    def occurrences(self, text, t_type, page_lang):
+        return len(self._entries.get((text, t_type, page_lang), ()))
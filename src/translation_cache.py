@@ -0,0 +1,146 @@
+from apify import Actor
+import hashlib
+import os
+import sqlite3
+import tempfile
+import time
+from importlib import metadata
+
+CACHE_RECORD_KEY = 'translation-cache.sqlite'
+
+
+def engine_version():
+    """Identifies the translation engine; cached entries from another version are never reused."""
+    try:
+        sdk = metadata.version('lingodotdev')
+    except metadata.PackageNotFoundError:
+        sdk = 'unknown'
+    return f"lingodotdev-{sdk}-fast"
+
+
+class TranslationCache:
+    """
+    Persistent translation cache in a SQLite file, keyed by
+    (sha256 of source text, target locale, engine version).
+
+    Entries expire after `ttl_seconds`; above `max_entries` the least recently
+    used rows are evicted. On the platform the file round-trips through a named
+    key-value store (open_from_store / persist), so it survives across runs.
+    """
+
+    def __init__(self, path, ttl_seconds=30 * 86400, max_entries=200000, version=None):
+        self.path = path
+        self.ttl_seconds = ttl_seconds
+        self.max_entries = max_entries
+        self.version = version or engine_version()
+        self.hits = 0
+        self.misses = 0
+        self._store = None
+        self._db = sqlite3.connect(path)
+        self._db.execute(
+            "CREATE TABLE IF NOT EXISTS translations ("
+            " text_hash TEXT NOT NULL, locale TEXT NOT NULL, version TEXT NOT NULL,"
+            " translation TEXT NOT NULL, created_at REAL NOT NULL, last_used REAL NOT NULL,"
+            " PRIMARY KEY (text_hash, locale, version))"
+        )
+        self._db.execute("CREATE INDEX IF NOT EXISTS translations_last_used ON translations (last_used)")
+        self._db.commit()
+
+    @classmethod
+    async def open_from_store(cls, store_name, **kwargs):
+        """Restores the cache file from a named key-value store (or starts empty)."""
+        store = await Actor.open_key_value_store(name=store_name)
+        fd, path = tempfile.mkstemp(suffix='.sqlite')
+        with os.fdopen(fd, 'wb') as f:
+            data = await store.get_value(CACHE_RECORD_KEY)
+            if data:
+                f.write(data)
+        cache = cls(path, **kwargs)
+        cache._store = store
+        cache.evict()
+        Actor.log.info(f"Translation cache loaded from store '{store_name}': {len(cache)} entries")
+        return cache
+
+    async def persist(self):
+        """Evicts, compacts and uploads the cache file back to its key-value store."""
+        self.evict()
+        self._db.execute("VACUUM")
+        if self._store is None:
+            return
+        with open(self.path, 'rb') as f:
+            await self._store.set_value(CACHE_RECORD_KEY, f.read(), content_type='application/octet-stream')
+
+    def close(self):
+        self._db.close()
+        if self._store is not None:
+            os.remove(self.path)
+
+    @staticmethod
+    def _hash(text):
+        return hashlib.sha256(text.encode('utf-8')).hexdigest()
+
+    def __len__(self):
+        return self._db.execute("SELECT COUNT(*) FROM translations").fetchone()[0]
+
+    def get_many(self, texts, locale):
+        """Returns {text: translation} for the texts that have a fresh entry."""
+        now = time.time()
+        by_hash = {self._hash(text): text for text in texts}
+        found = {}
+        hashes = list(by_hash)
+        # Stay below SQLite's bound-parameter limit
+        for start in range(0, len(hashes), 500):
+            chunk = hashes[start:start + 500]
+            rows = self._db.execute(
+                f"SELECT text_hash, translation FROM translations"
+                f" WHERE locale = ? AND version = ? AND created_at > ?"
+                f" AND text_hash IN ({','.join('?' * len(chunk))})",
+                (locale, self.version, now - self.ttl_seconds, *chunk),
+            ).fetchall()
+            for text_hash, translation in rows:
+                found[by_hash[text_hash]] = translation
+        if found:
+            self._db.executemany(
+                "UPDATE translations SET last_used = ? WHERE text_hash = ? AND locale = ? AND version = ?",
+                [(now, self._hash(text), locale, self.version) for text in found],
+            )
+            self._db.commit()
+        self.hits += len(found)
+        self.misses += len(by_hash) - len(found)
+        return found
+
+    def get(self, text, locale):
+        return self.get_many([text], locale).get(text)
+
+    def put_many(self, translations, locale):
+        now = time.time()
+        self._db.executemany(
+            "INSERT OR REPLACE INTO translations VALUES (?, ?, ?, ?, ?, ?)",
+            [(self._hash(text), locale, self.version, translation, now, now)
+             for text, translation in translations.items() if translation],
+        )
+        self._db.commit()
+
+    def put(self, text, locale, translation):
+        self.put_many({text: translation}, locale)
+
+    def evict(self):
+        """Drops expired rows, then the least recently used ones above max_entries."""
+        self._db.execute("DELETE FROM translations WHERE created_at <= ?", (time.time() - self.ttl_seconds,))
+        overflow = len(self) - self.max_entries
+        if overflow > 0:
+            self._db.execute(
+                "DELETE FROM translations WHERE rowid IN"
+                " (SELECT rowid FROM translations ORDER BY last_used LIMIT ?)",
+                (overflow,),
+            )
+        self._db.commit()
+
+    def stats(self):
+        total = self.hits + self.misses
+        return {
+            'entries': len(self),
+            'hits': self.hits,
+            'misses': self.misses,
+            'hit_rate': round(self.hits / total, 3) if total else 0.0,
+        }